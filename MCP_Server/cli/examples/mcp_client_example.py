@@ -11,10 +11,31 @@ import subprocess
 import sys
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj):
+    """Serialize a JSON-RPC message to bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(data):
+    """Parse a JSON document from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 class MCPClient:
     """Simple MCP client for demonstration purposes."""
 
+    __slots__ = ("server_script", "server_process")
+
     def __init__(self, server_script="vuln_mcp_stdio.py"):
         self.server_script = server_script
         self.server_process = None
@@ -27,7 +48,6 @@ class MCPClient:
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
             )
             print(f"MCP server started with PID: {self.server_process.pid}")
         except Exception as e:
@@ -42,6 +62,18 @@ class MCPClient:
             self.server_process.wait()
             print("MCP server stopped")
 
+    def _send(self, request):
+        """Write one newline-delimited JSON-RPC message to the server."""
+        self.server_process.stdin.write(_dumps(request) + b"\n")
+        self.server_process.stdin.flush()
+
+    def _receive(self):
+        """Read one JSON-RPC message from the server."""
+        response_line = self.server_process.stdout.readline()
+        if response_line:
+            return _loads(response_line)
+        return {"error": "No response from server"}
+
     def call_tool(self, tool_name, **kwargs):
         """Call a tool on the MCP server."""
         if not self.server_process:
@@ -56,20 +88,57 @@ class MCPClient:
         }
 
         try:
-            # Send request to server
-            self.server_process.stdin.write(json.dumps(request) + "\n")
+            self._send(request)
+            return self._receive()
+
+        except Exception as e:
+            return {"error": f"Failed to call tool: {e}"}
+
+    def call_batch(self, calls):
+        """
+        Call several tools with a single pipelined write.
+
+        Every request is sent before any response is read, so the round
+        trips overlap. Takes (tool_name, arguments) pairs and returns the
+        responses in the same order.
+        """
+        if not self.server_process:
+            return [{"error": "Server not started"} for _ in calls]
+
+        requests = [
+            {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": "tools/call",
+                "params": {"name": tool_name, "arguments": arguments},
+            }
+            for request_id, (tool_name, arguments) in enumerate(calls, 1)
+        ]
+
+        try:
+            self.server_process.stdin.write(
+                b"".join(_dumps(request) + b"\n" for request in requests)
+            )
             self.server_process.stdin.flush()
 
-            # Read response
-            response_line = self.server_process.stdout.readline()
-            if response_line:
-                response = json.loads(response_line.strip())
-                return response
-            else:
-                return {"error": "No response from server"}
+            # Responses may arrive in any order; match them up by id
+            responses = {}
+            while len(responses) < len(requests):
+                response = self._receive()
+                if "error" in response and "id" not in response:
+                    break
+                if "id" in response:
+                    responses[response["id"]] = response
+
+            return [
+                responses.get(
+                    request["id"], {"error": "No response from server"}
+                )
+                for request in requests
+            ]
 
         except Exception as e:
-            return {"error": f"Failed to call tool: {e}"}
+            return [{"error": f"Failed to call tool: {e}"} for _ in calls]
 
     def list_tools(self):
         """List available tools."""
@@ -84,14 +153,8 @@ class MCPClient:
         }
 
         try:
-            self.server_process.stdin.write(json.dumps(request) + "\n")
-            self.server_process.stdin.flush()
-
-            response_line = self.server_process.stdout.readline()
-            if response_line:
-                return json.loads(response_line.strip())
-            else:
-                return {"error": "No response from server"}
+            self._send(request)
+            return self._receive()
 
         except Exception as e:
             return {"error": f"Failed to list tools: {e}"}
@@ -137,30 +200,24 @@ def demonstrate_llm_usage():
         )
         print("-" * 40)
 
-        # LLM calls detect_pii first
-        print("   LLM calls detect_pii tool...")
-        detect_result = client.call_tool(
-            "detect_pii", text="Contact john@example.com or call 555-123-4567"
+        # LLM calls detect_pii and sanitize_text together; neither depends
+        # on the other, so both requests go out in one write
+        print("   LLM calls detect_pii and sanitize_text tools...")
+        text = "Contact john@example.com or call 555-123-4567"
+        detect_result, sanitize_result = client.call_batch(
+            [
+                ("detect_pii", {"text": text}),
+                ("sanitize_text", {"text": text, "redaction_type": "generic"}),
+            ]
         )
         if "result" in detect_result:
-            detection = json.loads(
-                detect_result["result"]["content"][0]["text"]
-            )
+            detection = _loads(detect_result["result"]["content"][0]["text"])
             print(f"   PII detected: {detection['total_detections'] > 0}")
             print(
                 f"   Categories: {[cat for cat, count in detection['categories'].items() if count > 0]}"
             )
-        print()
-
-        # LLM calls sanitize_text
-        print("   LLM calls sanitize_text tool...")
-        sanitize_result = client.call_tool(
-            "sanitize_text",
-            text="Contact john@example.com or call 555-123-4567",
-            redaction_type="generic",
-        )
         if "result" in sanitize_result:
-            result = json.loads(sanitize_result["result"]["content"][0]["text"])
+            result = _loads(sanitize_result["result"]["content"][0]["text"])
             print(f"   Sanitized text: {result['sanitized_text']}")
         print()
 
@@ -178,7 +235,7 @@ def demonstrate_llm_usage():
             redaction_type="mask",
         )
         if "result" in file_result:
-            result = json.loads(file_result["result"]["content"][0]["text"])
+            result = _loads(file_result["result"]["content"][0]["text"])
             print(f"   Original file: {result['original_file']}")
             print(f"   Sanitized file: {result['sanitized_file']}")
             print(f"   PII detected: {result['pii_detected']}")
@@ -5,20 +5,24 @@ Simple CLI for Gemini + MCP Sanitizer
 Easy-to-use command line interface for PII sanitization.
 """
 
+import argparse
 import asyncio
 import json
 import os
 import sys
+from contextlib import AsyncExitStack
 from pathlib import Path
 
 # Add MCP to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 try:
-    import google.generativeai as genai
     from mcp import ClientSession, StdioServerParameters
     from mcp.client.stdio import stdio_client
 except ImportError as e:
+    # Only bootstrap dependencies when run as a script, never on import
+    if __name__ != "__main__":
+        raise
     print(f"Missing dependencies: {e}")
     print("Installing required packages...")
     import subprocess
@@ -34,7 +38,6 @@ except ImportError as e:
             "python-dotenv",
         ]
     )
-    import google.generativeai as genai
     from mcp import ClientSession, StdioServerParameters
     from mcp.client.stdio import stdio_client
 
@@ -54,15 +57,30 @@ except ImportError:
 class SanitizerCLI:
     """Simple CLI for PII sanitization."""
 
+    __slots__ = ("_model", "_exit_stack", "_session")
+
     def __init__(self):
-        """Initialize Gemini."""
-        # Get API key
-        api_key = os.getenv("GCP_KEY") or os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("Please set GCP_KEY or GEMINI_API_KEY")
+        """Initialize the CLI; Gemini is configured on first use."""
+        self._model = None
+
+        # MCP session, opened by __aenter__
+        self._exit_stack = None
+        self._session = None
+
+    @property
+    def model(self):
+        """Gemini model, imported and configured on first access."""
+        if self._model is None:
+            # Get API key
+            api_key = os.getenv("GCP_KEY") or os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("Please set GCP_KEY or GEMINI_API_KEY")
 
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
+            import google.generativeai as genai
+
+            genai.configure(api_key=api_key)
+            self._model = genai.GenerativeModel("gemini-1.5-flash")
+        return self._model
 
     def ask_gemini(self, prompt):
         """Ask Gemini a question."""
@@ -92,109 +110,87 @@ class SanitizerCLI:
             return tool_name, arguments
         return None, {}
 
-    async def sanitize_text(self, text, redaction_type="generic"):
-        """Sanitize text using MCP tools."""
+    async def __aenter__(self):
+        """Start the MCP server and open a session reused by every call."""
+        server_params = StdioServerParameters(
+            command="python",
+            args=[
+                str(
+                    Path(__file__).parent.parent.parent
+                    / "core"
+                    / "server"
+                    / "vuln_mcp_stdio.py"
+                )
+            ],
+            env={"PYTHONPATH": str(Path(__file__).parent.parent.parent)},
+        )
+
+        self._exit_stack = AsyncExitStack()
         try:
-            server_params = StdioServerParameters(
-                command="python",
-                args=[
-                    str(
-                        Path(__file__).parent.parent.parent
-                        / "core"
-                        / "server"
-                        / "vuln_mcp_stdio.py"
-                    )
-                ],
-                env={"PYTHONPATH": str(Path(__file__).parent.parent.parent)},
+            read, write = await self._exit_stack.enter_async_context(
+                stdio_client(server_params)
             )
+            self._session = await self._exit_stack.enter_async_context(
+                ClientSession(read, write)
+            )
+            await self._session.initialize()
+        except BaseException:
+            await self._exit_stack.aclose()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Close the MCP session and stop the server."""
+        await self._exit_stack.aclose()
+        self._session = None
+
+    async def _call_tool(self, name, arguments):
+        """Call an MCP tool and decode its JSON result."""
+        try:
+            result = await self._session.call_tool(name, arguments)
 
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-
-                    # Call sanitize_text tool
-                    result = await session.call_tool(
-                        "sanitize_text",
-                        {"text": text, "redaction_type": redaction_type},
-                    )
+            # Use structured output when the tool returned an object itself;
+            # FastMCP wraps plain string returns as {"result": ...}
+            structured = getattr(result, "structuredContent", None)
+            if isinstance(structured, dict) and set(structured) != {"result"}:
+                return structured
 
-                    if result.content:
-                        return json.loads(result.content[0].text)
-                    return None
+            if result.content:
+                return json.loads(result.content[0].text)
+            return None
 
         except Exception as e:
             print(f"❌ Error: {e}")
             return None
 
-    async def detect_pii(self, text):
-        """Detect PII in text using MCP tools."""
-        try:
-            server_params = StdioServerParameters(
-                command="python",
-                args=[
-                    str(
-                        Path(__file__).parent.parent.parent
-                        / "core"
-                        / "server"
-                        / "vuln_mcp_stdio.py"
-                    )
-                ],
-                env={"PYTHONPATH": str(Path(__file__).parent.parent.parent)},
-            )
-
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
+    async def call_many(self, calls):
+        """
+        Call several MCP tools concurrently over the open session.
 
-                    # Call detect_pii tool
-                    result = await session.call_tool(
-                        "detect_pii", {"text": text}
-                    )
+        Takes (tool_name, arguments) pairs and returns the decoded results in
+        the same order. Requests are in flight together, so independent
+        calls cost roughly one round trip.
+        """
+        return await asyncio.gather(
+            *(self._call_tool(name, arguments) for name, arguments in calls)
+        )
 
-                    if result.content:
-                        return json.loads(result.content[0].text)
-                    return None
+    async def sanitize_text(self, text, redaction_type="generic"):
+        """Sanitize text using MCP tools."""
+        return await self._call_tool(
+            "sanitize_text", {"text": text, "redaction_type": redaction_type}
+        )
 
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return None
+    async def detect_pii(self, text):
+        """Detect PII in text using MCP tools."""
+        return await self._call_tool("detect_pii", {"text": text})
 
     async def sanitize_file(self, file_path, redaction_type="generic"):
         """Sanitize file using MCP tools."""
-        try:
-            server_params = StdioServerParameters(
-                command="python",
-                args=[
-                    str(
-                        Path(__file__).parent.parent.parent
-                        / "core"
-                        / "server"
-                        / "vuln_mcp_stdio.py"
-                    )
-                ],
-                env={"PYTHONPATH": str(Path(__file__).parent.parent.parent)},
-            )
-
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-
-                    # Call sanitize_file tool
-                    result = await session.call_tool(
-                        "sanitize_file",
-                        {
-                            "file_path": file_path,
-                            "redaction_type": redaction_type,
-                        },
-                    )
-
-                    if result.content:
-                        return json.loads(result.content[0].text)
-                    return None
-
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return None
+        return await self._call_tool(
+            "sanitize_file",
+            {"file_path": file_path, "redaction_type": redaction_type},
+        )
 
 
 def print_usage():
@@ -226,95 +222,109 @@ Examples:
     )
 
 
+async def run_detect(cli, args):
+    """Handle the detect command."""
+    text = " ".join(args.text)
+    print(f"🔍 Detecting PII in: {text}")
+
+    result = await cli.detect_pii(text)
+    if result:
+        print(f"📊 PII Detection Results:")
+        print(f"   Total detections: {result['total_detections']}")
+        print(f"   Categories: {result['categories']}")
+        if result["total_detections"] > 0:
+            print(f"   Details: {result['detailed_findings']}")
+    else:
+        print("❌ Failed to detect PII")
+
+
+async def run_sanitize(cli, args):
+    """Handle the sanitize command."""
+    text = " ".join(args.text)
+    print(f"🧹 Sanitizing text: {text}")
+    print(f"   Redaction type: {args.redaction_type}")
+
+    result = await cli.sanitize_text(text, args.redaction_type)
+    if result:
+        print(f"✅ Sanitized result: {result['sanitized_text']}")
+        print(f"   PII detected: {result['pii_detected']}")
+    else:
+        print("❌ Failed to sanitize text")
+
+
+async def run_file(cli, args):
+    """Handle the file command."""
+    print(f"📁 Sanitizing file: {args.path}")
+    print(f"   Redaction type: {args.redaction_type}")
+
+    result = await cli.sanitize_file(args.path, args.redaction_type)
+    if result:
+        print(f"✅ File sanitized successfully!")
+        print(f"   Output: {result}")
+    else:
+        print("❌ Failed to sanitize file")
+
+
+COMMANDS = {
+    "detect": run_detect,
+    "sanitize": run_sanitize,
+    "file": run_file,
+}
+
+
+def build_parser():
+    """Build the argument parser for the CLI commands."""
+    parser = argparse.ArgumentParser(prog="sanitize_cli.py", add_help=False)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    detect = subparsers.add_parser("detect", add_help=False)
+    detect.add_argument("text", nargs="+")
+
+    sanitize = subparsers.add_parser("sanitize", add_help=False)
+    sanitize.add_argument("text", nargs="+")
+
+    file_parser = subparsers.add_parser("file", add_help=False)
+    file_parser.add_argument("path")
+
+    for sub in (sanitize, file_parser):
+        sub.add_argument(
+            "--type",
+            dest="redaction_type",
+            choices=["generic", "mask", "remove"],
+            default="generic",
+        )
+
+    return parser
+
+
+PARSER = build_parser()
+
+
 async def main():
     """Main CLI function."""
-    if len(sys.argv) < 2:
+    argv = sys.argv[1:]
+    if not argv or argv[0].lower() in ["help", "-h", "--help"]:
         print_usage()
         return
 
-    command = sys.argv[1].lower()
-
-    if command in ["help", "-h", "--help"]:
+    argv[0] = argv[0].lower()
+    if argv[0] not in COMMANDS:
+        print(f"❌ Unknown command: {argv[0]}")
         print_usage()
         return
 
-    try:
-        cli = SanitizerCLI()
-    except ValueError as e:
-        print(f"❌ {e}")
-        print(
-            "Please set GCP_KEY in .env file or GEMINI_API_KEY environment variable"
-        )
-        return
+    args = PARSER.parse_args(argv)
 
-    # Parse arguments
-    redaction_type = "generic"
-    if "--type" in sys.argv:
-        try:
-            type_index = sys.argv.index("--type")
-            if type_index + 1 < len(sys.argv):
-                redaction_type = sys.argv[type_index + 1]
-        except (ValueError, IndexError):
-            print("❌ Invalid --type argument")
-            return
-
-    if command == "detect":
-        if len(sys.argv) < 3:
-            print("❌ Please provide text to detect PII in")
-            return
-
-        text = " ".join(sys.argv[2:])
-        print(f"🔍 Detecting PII in: {text}")
-
-        result = await cli.detect_pii(text)
-        if result:
-            print(f"📊 PII Detection Results:")
-            print(f"   Total detections: {result['total_detections']}")
-            print(f"   Categories: {result['categories']}")
-            if result["total_detections"] > 0:
-                print(f"   Details: {result['detailed_findings']}")
-        else:
-            print("❌ Failed to detect PII")
-
-    elif command == "sanitize":
-        if len(sys.argv) < 3:
-            print("❌ Please provide text to sanitize")
-            return
-
-        text = " ".join(sys.argv[2:])
-        print(f"🧹 Sanitizing text: {text}")
-        print(f"   Redaction type: {redaction_type}")
-
-        result = await cli.sanitize_text(text, redaction_type)
-        if result:
-            print(f"✅ Sanitized result: {result['sanitized_text']}")
-            print(f"   PII detected: {result['pii_detected']}")
-        else:
-            print("❌ Failed to sanitize text")
-
-    elif command == "file":
-        if len(sys.argv) < 3:
-            print("❌ Please provide file path")
-            return
-
-        file_path = sys.argv[2]
-        if not os.path.exists(file_path):
-            print(f"❌ File not found: {file_path}")
-            return
-
-        print(f"📁 Sanitizing file: {file_path}")
-        print(f"   Redaction type: {redaction_type}")
-
-        result = await cli.sanitize_file(file_path, redaction_type)
-        if result:
-            print(f"✅ File sanitized successfully!")
-            print(f"   Output: {result}")
-        else:
-            print("❌ Failed to sanitize file")
+    if args.command == "file" and not os.path.exists(args.path):
+        print(f"❌ File not found: {args.path}")
+        return
 
-    else:
-        print(f"❌ Unknown command: {command}")
-        print_usage()
+    cli = SanitizerCLI()
+    try:
+        async with cli:
+            await COMMANDS[args.command](cli, args)
+    except Exception as e:
+        print(f"❌ Error: {e}")
 
 
 if __name__ == "__main__":
@@ -9,18 +9,383 @@ from the PII_testing module. It can redact sensitive information from text input
 import sys
 import os
 import re
+import ipaddress
 import json
+import hashlib
+import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from functools import lru_cache, partial
 from pathlib import Path
+from threading import Lock
 
-# Add the PII_testing directory to the path
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# Path to the PII_testing directory holding the full detector
 pii_testing_path = Path(__file__).parent.parent.parent.parent / "PII_testing"
-sys.path.insert(0, str(pii_testing_path))
 
-try:
-    from pii_logging import Enhanced_PII_Logging
-except ImportError as e:
-    print(f"Error importing PII detection module: {e}", file=sys.stderr)
-    raise
+
+@lru_cache(maxsize=None)
+def _get_detector_cls():
+    """Import the PII detector (and its spaCy/networkx stack) on first use."""
+    sys.path.insert(0, str(pii_testing_path))
+
+    try:
+        from pii_logging import Enhanced_PII_Logging
+    except ImportError as e:
+        print(f"Error importing PII detection module: {e}", file=sys.stderr)
+        raise
+
+    return Enhanced_PII_Logging
+
+
+@lru_cache(maxsize=None)
+def _get_parse_batch():
+    """Import the detector's batched spaCy parser on first use."""
+    _get_detector_cls()
+    from pii_logging import parse_batch
+
+    return parse_batch
+
+
+# PII patterns for redaction
+_RAW_PATTERNS = {
+    "EMAIL": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
+    "PHONE": r"\b(?:\+?1[\s.-]?)?(\(?\d{3}\)?[\s.-]?)\d{3}[\s.-]?\d{4}\b",
+    "SSN": r"\b\d{3}-\d{2}-\d{4}\b",
+    "Credit_Card": r"\b\d{4}-\d{4}-\d{4}-\d{4}\b|\b\d{16}\b",
+    "Expiration_Date": r"\b\d{2}/\d{2}\b",
+    "CVV": r"(?i)(cvv|cvc|cid|security\s+code)[\s:]*['\"]?\d{3,4}['\"]?",
+    "Driver's_License": r"(?i)\b(?:[A-Z]{1,3}\d{4,8}|[A-Z]\d{6,12}|\d{3}[A-Z]{2}\d{4})\b",
+    # IP addresses are matched as cheap, backtracking-free candidates and
+    # then validated by _IP_VALIDATORS
+    "IPv4_Address": r"\b\d{1,3}(?:\.\d{1,3}){3}\b",
+    "IPV6_Address": r"(?<![\w:.])(?:[0-9a-f]{0,4}:){2,7}(?:(?:\d{1,3}\.){3}\d{1,3}|[0-9a-f]{1,4})?(?:%[0-9a-z]+)?(?![\w:])",
+}
+
+
+def _is_ipv4(candidate):
+    """Check that every octet of a dotted quad is in range."""
+    return all(int(octet) <= 255 for octet in candidate.split("."))
+
+
+def _is_ipv6(candidate):
+    """Check a colon-separated candidate with the ipaddress parser."""
+    try:
+        ipaddress.IPv6Address(candidate)
+    except ValueError:
+        return False
+    return True
+
+
+_IP_VALIDATORS = {"IPv4_Address": _is_ipv4, "IPV6_Address": _is_ipv6}
+
+
+# Single alternation over every PII pattern. Group names must be valid
+# identifiers, and the inline (?i) flags are dropped because IGNORECASE
+# applies to the whole union.
+_GROUP_CATEGORIES = {
+    re.sub(r"\W", "_", name): name for name in _RAW_PATTERNS
+}
+
+
+@lru_cache(maxsize=64)
+def _union_for(categories):
+    """Compile the alternation over the given categories, in priority order."""
+    return re.compile(
+        "|".join(
+            "(?P<%s>%s)" % (group, _RAW_PATTERNS[name].removeprefix("(?i)"))
+            for group, name in _GROUP_CATEGORIES.items()
+            if name in categories
+        ),
+        re.IGNORECASE,
+    )
+
+
+_UNION_RE = _union_for(frozenset(_RAW_PATTERNS))
+
+# Literal anchors each category needs somewhere in the text: whether it
+# needs a digit, and substrings of which at least one must be present
+_PATTERN_ANCHORS = {
+    "EMAIL": (False, ("@",)),
+    "PHONE": (True, ()),
+    "SSN": (True, ("-",)),
+    "Credit_Card": (True, ()),
+    "Expiration_Date": (True, ("/",)),
+    "CVV": (True, ("cvv", "cvc", "cid", "security")),
+    "Driver's_License": (True, ()),
+    "IPv4_Address": (True, (".",)),
+    "IPV6_Address": (False, (":",)),
+}
+_DIGIT_RE = re.compile(r"\d")
+
+
+def _active_categories(text):
+    """Categories whose literal anchors appear in the text."""
+    has_digit = _DIGIT_RE.search(text) is not None
+    active = []
+    for name, (needs_digit, literals) in _PATTERN_ANCHORS.items():
+        if needs_digit and not has_digit:
+            continue
+        if literals:
+            if literals[0].isalpha():
+                # Keyword anchors; re's case folding of non-ASCII letters
+                # (e.g. U+0130) differs from str.lower, so only filter ASCII
+                if text.isascii():
+                    lowered = text.lower()
+                    if not any(literal in lowered for literal in literals):
+                        continue
+            elif not any(literal in text for literal in literals):
+                continue
+        active.append(name)
+    return frozenset(active)
+
+
+def _match_category(match):
+    """Return the PII category of a union match, or None if it is invalid."""
+    category = _GROUP_CATEGORIES[match.lastgroup]
+    validator = _IP_VALIDATORS.get(category)
+    if validator is not None and not validator(match.group()):
+        return None
+    return category
+
+
+# Every regex category needs a digit, "@" or ":" (bare IPv6 like "fe80::a"),
+# so text without any of them can skip the union scan entirely
+_PII_HINT_RE = re.compile(r"[@:\d]")
+
+
+@lru_cache(maxsize=1)
+def _get_hyperscan_db():
+    """
+    Compile all PII patterns into one Hyperscan database, if available.
+
+    Patterns are compiled in prefilter mode, so Hyperscan may report
+    false positives but never misses a match; the re union still decides
+    the actual spans.
+    """
+    if hyperscan is None:
+        return None
+
+    flags = (
+        hyperscan.HS_FLAG_CASELESS
+        | hyperscan.HS_FLAG_PREFILTER
+        | hyperscan.HS_FLAG_SINGLEMATCH
+        | hyperscan.HS_FLAG_UTF8
+        | hyperscan.HS_FLAG_UCP
+    )
+    expressions = [
+        pattern.removeprefix("(?i)").encode() for pattern in _RAW_PATTERNS.values()
+    ]
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=[flags] * len(expressions),
+        )
+    except hyperscan.error:
+        return None
+    return db
+
+
+# Hyperscan scratch space is shared by the database
+_HYPERSCAN_LOCK = Lock()
+
+
+def _may_contain_pii(text):
+    """Cheap check that rules out text no PII pattern can match."""
+    if not _PII_HINT_RE.search(text):
+        return False
+
+    db = _get_hyperscan_db()
+    if db is None:
+        return True
+
+    def on_match(pattern_id, start, end, flags, context):
+        return True  # stop at the first hit
+
+    # Hyperscan needs valid UTF-8; lone surrogates can't be PII anyway
+    data = text.encode("utf-8", "replace")
+    with _HYPERSCAN_LOCK:
+        try:
+            db.scan(data, match_event_handler=on_match)
+        except hyperscan.ScanTerminated:
+            return True
+    return False
+
+
+def _rewrite_pii(text, replace):
+    """
+    Rewrite every valid PII match in a single pass.
+
+    Args:
+        text (str): Text to rewrite
+        replace (callable): Called as replace(match, category) and returns
+            the replacement string
+
+    Returns:
+        tuple: (rewritten text, number of PII matches replaced)
+    """
+    if not _may_contain_pii(text):
+        return text, 0
+
+    # Leave out alternatives that cannot match anywhere in this text
+    categories = _active_categories(text)
+    if not categories:
+        return text, 0
+
+    union = _union_for(categories)
+    parts = []
+    last = pos = 0
+    count = 0
+    while (match := union.search(text, pos)) is not None:
+        category = _match_category(match)
+        if category is None:
+            # A rejected candidate can hide a valid one inside it, e.g.
+            # 10.10.10.10 in 999.10.10.10.10, so rescan from the next char
+            pos = match.start() + 1
+            continue
+        parts.append(text[last : match.start()])
+        parts.append(replace(match, category))
+        last = pos = match.end()
+        count += 1
+
+    if not count:
+        return text, 0
+    parts.append(text[last:])
+    return "".join(parts), count
+
+
+# Patterns used by mask redaction, fused into one pass in priority order
+_MASK_PATTERNS = {
+    "EMAIL": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
+    "PHONE": r"\b(?:\+?1[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b",
+    "SSN": r"\b\d{3}-\d{2}-\d{4}\b",
+    "CC": r"\b\d{4}-\d{4}-\d{4}-\d{4}\b|\b\d{16}\b",
+}
+_MASK_RE = re.compile(
+    "|".join(
+        "(?P<%s>%s)" % (name, pattern) for name, pattern in _MASK_PATTERNS.items()
+    )
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _mask_email(value):
+    local, _, domain = value.partition("@")
+    domain, _, tld = domain.rpartition(".")
+    return f"{local[0]}***@{domain[0]}***.{tld[0]}***"
+
+
+def _mask_phone(value):
+    if len(value) >= 10:
+        return value[:3] + "***" + value[-4:]
+    return "***"
+
+
+def _mask_ssn(value):
+    return "***-**-****"
+
+
+def _mask_cc(value):
+    cc = value.replace("-", "")
+    if len(cc) == 16:
+        return cc[:4] + "-****-****-" + cc[-4:]
+    return "****-****-****-****"
+
+
+_MASKERS = {
+    "EMAIL": _mask_email,
+    "PHONE": _mask_phone,
+    "SSN": _mask_ssn,
+    "CC": _mask_cc,
+}
+
+
+def _mask_match(match):
+    return _MASKERS[match.lastgroup](match.group())
+
+
+@lru_cache(maxsize=1024)
+def _detect_pii_cached(text, enable_proximity, enable_graph, window_size):
+    """Run the full PII detector once per distinct input and settings."""
+    detector = _get_detector_cls()(
+        text,
+        output=False,
+        replace=False,
+        log_type="Mask",
+        debug=False,
+        enable_proximity=enable_proximity,
+        enable_graph=enable_graph,
+        window_size=window_size,
+    )
+
+    return detector.get_detection_summary()
+
+
+# Sanitized blocks from sanitize_stream, keyed by a digest of the block so
+# the cache does not pin megabyte-sized inputs
+_BLOCK_CACHE = OrderedDict()
+_BLOCK_CACHE_SIZE = 16
+_BLOCK_CACHE_LOCK = Lock()
+
+
+class _RemovalWriter:
+    """
+    Write "remove" output block by block, tidying whitespace like
+    sanitize_text: runs collapse to one space and the ends are stripped.
+
+    sanitize_text only tidies once something was removed, so blocks before
+    the first PII are spooled until it is known whether that happens.
+    """
+
+    def __init__(self, dst):
+        self.dst = dst
+        self.pending = tempfile.SpooledTemporaryFile(
+            max_size=1 << 20, mode="w+", newline="", errors="surrogatepass"
+        )
+        self.found = False
+        self.started = False
+        self.space = False
+
+    def write(self, text, found):
+        if not self.found:
+            if not found:
+                self.pending.write(text)
+                return
+            self.found = True
+            self.pending.seek(0)
+            while chunk := self.pending.read(1 << 20):
+                self._tidy(chunk)
+            self.pending.close()
+        self._tidy(text)
+
+    def finish(self):
+        # Nothing was removed: the input passes through untouched
+        if not self.found:
+            self.pending.seek(0)
+            shutil.copyfileobj(self.pending, self.dst)
+
+    def close(self):
+        self.pending.close()
+
+    def _tidy(self, text):
+        core = text.strip()
+        if not core:
+            self.space = self.space or bool(text)
+            return
+        if self.started and (self.space or text[0].isspace()):
+            self.dst.write(" ")
+        self.dst.write(_WHITESPACE_RE.sub(" ", core))
+        self.started = True
+        self.space = text[-1].isspace()
 
 
 class SanitizerAgent:
@@ -43,19 +408,6 @@ class SanitizerAgent:
         self.enable_graph = enable_graph
         self.window_size = window_size
 
-        # PII patterns for redaction
-        self.pii_patterns = {
-            "EMAIL": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
-            "PHONE": r"\b(?:\+?1[\s.-]?)?(\(?\d{3}\)?[\s.-]?)\d{3}[\s.-]?\d{4}\b",
-            "SSN": r"\b\d{3}-\d{2}-\d{4}\b",
-            "Credit_Card": r"\b\d{4}-\d{4}-\d{4}-\d{4}\b|\b\d{16}\b",
-            "Expiration_Date": r"\b\d{2}/\d{2}\b",
-            "CVV": r"(?i)(cvv|cvc|cid|security\s+code)[\s:]*['\"]?\d{3,4}['\"]?",
-            "Driver's_License": r"(?i)\b(?:[A-Z]{1,3}\d{4,8}|[A-Z]\d{6,12}|\d{3}[A-Z]{2}\d{4})\b",
-            "IPv4_Address": r"\b(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)(?:\.(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)){3}\b",
-            "IPV6_Address": r"(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}|([0-9a-fA-F]{1,4}:){1,7}:|:(:[0-9a-fA-F]{1,4}){1,7}|([0-9a-fA-F]{1,4}:){1,6}:[0-9a-fA-F]{1,4}|([0-9a-fA-F]{1,4}:){1,5}(:[0-9a-fA-F]{1,4}){1,2}|([0-9a-fA-F]{1,4}:){1,4}(:[0-9a-fA-F]{1,4}){1,3}|([0-9a-fA-F]{1,4}:){1,3}(:[0-9a-fA-F]{1,4}){1,4}|([0-9a-fA-F]{1,4}:){1,2}(:[0-9a-fA-F]{1,4}){1,5}|[0-9a-fA-F]{1,4}:((:[0-9a-fA-F]{1,4}){1,6})|::((:[0-9a-fA-F]{1,4}){1,7}|:)|fe80:(:[0-9a-fA-F]{0,4}){0,4}%[0-9a-zA-Z]{1,}|(::ffff|::)ffff:([0-9]{1,3}\.){3}[0-9]{1,3}",
-        }
-
         # Redaction patterns for different PII types
         self.redaction_patterns = {
             "EMAIL": "[REDACTED_EMAIL]",
@@ -83,30 +435,63 @@ class SanitizerAgent:
         Returns:
             dict: Detection summary with categories and details
         """
-        detector = Enhanced_PII_Logging(
-            text,
-            output=False,
-            replace=False,
-            log_type="Mask",
-            debug=False,
-            enable_proximity=self.enable_proximity,
-            enable_graph=self.enable_graph,
-            window_size=self.window_size,
+        # Results are cached; hand out a copy so callers can't corrupt it
+        return deepcopy(
+            _detect_pii_cached(
+                text, self.enable_proximity, self.enable_graph, self.window_size
+            )
         )
 
-        return detector.get_detection_summary()
+    def detect_pii_batch(self, texts, batch_size=64):
+        """
+        Detect PII in many texts, parsing all of them in one spaCy pass.
+
+        Args:
+            texts (list): Texts to analyze for PII
+            batch_size (int): Sentences per nlp.pipe batch
 
-    def sanitize_text(self, text, redaction_type="generic"):
+        Returns:
+            list: detect_pii summaries, in the same order as texts
+        """
+        texts = list(texts)
+        unique = list(dict.fromkeys(texts))
+        detector_cls = _get_detector_cls()
+        summaries = {}
+        for text, docs in zip(
+            unique, _get_parse_batch()(unique, batch_size=batch_size)
+        ):
+            summaries[text] = detector_cls(
+                text,
+                output=False,
+                replace=False,
+                log_type="Mask",
+                debug=False,
+                enable_proximity=self.enable_proximity,
+                enable_graph=self.enable_graph,
+                window_size=self.window_size,
+                docs=docs,
+            ).get_detection_summary()
+
+        # Repeated texts share a summary; give each position its own copy
+        return [deepcopy(summaries[text]) for text in texts]
+
+    def sanitize_text(self, text, redaction_type="generic", deep=False):
         """
         Sanitize text by redacting detected PII.
 
         Args:
             text (str): Text to sanitize
             redaction_type (str): Type of redaction ("generic", "mask", "remove")
+            deep (bool): Run the full PII detection pipeline even for
+                "generic"/"remove" redaction, which otherwise detect and
+                redact in a single regex pass
 
         Returns:
             dict: Contains sanitized text and detection details
         """
+        if not deep and redaction_type in ("generic", "remove"):
+            return self._fast_sanitize(text, redaction_type)
+
         # First detect PII
         detection_summary = self.detect_pii(text)
 
@@ -141,90 +526,204 @@ class SanitizerAgent:
             "redaction_type": redaction_type,
         }
 
-    def _apply_generic_redaction(self, text, detection_summary):
-        """Apply generic redaction using pattern matching."""
-        sanitized_text = text
+    def sanitize_batch(
+        self, texts, redaction_type="generic", deep=False, max_workers=None
+    ):
+        """
+        Sanitize many independent texts in parallel worker processes.
 
-        # Apply regex-based redaction for each PII type
-        for category, pattern in self.pii_patterns.items():
-            if (
-                category in detection_summary["categories"]
-                and detection_summary["categories"][category] > 0
-            ):
-                redaction_text = self.redaction_patterns.get(
-                    category, "[REDACTED]"
-                )
-                sanitized_text = re.sub(
-                    pattern, redaction_text, sanitized_text, flags=re.IGNORECASE
-                )
+        Args:
+            texts (list): Texts to sanitize
+            redaction_type (str): Type of redaction ("generic", "mask", "remove")
+            deep (bool): Passed through to sanitize_text
+            max_workers (int): Worker processes (defaults to the CPU count)
 
-        return sanitized_text
+        Returns:
+            list: sanitize_text results, in the same order as texts
+        """
+        texts = list(texts)
+        sanitize = partial(
+            self.sanitize_text, redaction_type=redaction_type, deep=deep
+        )
 
-    def _apply_mask_redaction(self, text, detection_summary):
-        """Apply mask redaction (e.g., john@example.com -> j***@e***.com)."""
-        sanitized_text = text
+        # Spawning workers costs more than a couple of regex passes
+        if len(texts) < 2:
+            return [sanitize(text) for text in texts]
 
-        # Email masking
-        email_pattern = (
-            r"\b([A-Za-z0-9._%+-]+)@([A-Za-z0-9.-]+)\.([A-Z|a-z]{2,})\b"
-        )
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as ex:
+            return list(ex.map(sanitize, texts, chunksize=32))
 
-        def mask_email(match):
-            local, domain, tld = match.groups()
-            return f"{local[0]}***@{domain[0]}***.{tld[0]}***"
+    def sanitize_stream(
+        self, src, dst, redaction_type="generic", chunk_size=1 << 20
+    ):
+        """
+        Sanitize a text file object into another, one block of lines at a time.
 
-        sanitized_text = re.sub(email_pattern, mask_email, sanitized_text)
+        Blocks end on line boundaries, so only PII spanning a newline can be
+        missed compared to sanitizing the whole content at once. "remove"
+        redaction tidies whitespace across block boundaries rather than per
+        block, so its output matches sanitize_text as well.
 
-        # Phone masking
-        phone_pattern = (
-            r"\b(?:\+?1[\s.-]?)?(\(?\d{3}\)?[\s.-]?)\d{3}[\s.-]?\d{4}\b"
-        )
+        Args:
+            src: Readable text file object
+            dst: Writable text file object receiving the sanitized text
+            redaction_type (str): Type of redaction ("generic", "mask", "remove")
+            chunk_size (int): Approximate number of characters per block
+
+        Returns:
+            dict: Detection summary merged across all blocks
+        """
+        summary = {
+            "total_detections": 0,
+            "categories": {},
+            "unique_pii_count": 0,
+            "detailed_findings": {},
+        }
+        unique_pii = set()
+        tidy = _RemovalWriter(dst) if redaction_type == "remove" else None
+        try:
+            while True:
+                lines = src.readlines(chunk_size)
+                if not lines:
+                    break
+                sanitized_text, part, values = self._sanitize_block(
+                    "".join(lines), redaction_type
+                )
+                if tidy is None:
+                    dst.write(sanitized_text)
+                else:
+                    tidy.write(sanitized_text, part["total_detections"] > 0)
+
+                summary["total_detections"] += part["total_detections"]
+                unique_pii |= values
+                categories = summary["categories"]
+                for category, count in part["categories"].items():
+                    categories[category] = categories.get(category, 0) + count
+                # Findings are keyed by sentence index within each block
+                findings = summary["detailed_findings"]
+                offset = len(findings)
+                for key, value in part["detailed_findings"].items():
+                    if isinstance(key, int):
+                        key += offset
+                    findings[key] = value
+            if tidy is not None:
+                tidy.finish()
+        finally:
+            if tidy is not None:
+                tidy.close()
+
+        summary["unique_pii_count"] = len(unique_pii)
+        return summary
+
+    def _sanitize_block(self, text, redaction_type):
+        """
+        Sanitize one sanitize_stream block, reusing recent results.
 
-        def mask_phone(match):
-            phone = match.group()
-            if len(phone) >= 10:
-                return phone[:3] + "***" + phone[-4:]
-            return "***"
+        "remove" blocks keep their whitespace for sanitize_stream to tidy.
 
-        sanitized_text = re.sub(phone_pattern, mask_phone, sanitized_text)
+        Returns:
+            tuple: (sanitized text, detection summary, frozenset of the
+                distinct PII values found)
+        """
+        key = (
+            hashlib.blake2b(
+                text.encode("utf-8", "surrogatepass"), digest_size=16
+            ).digest(),
+            redaction_type,
+            self.enable_proximity,
+            self.enable_graph,
+            self.window_size,
+        )
+        with _BLOCK_CACHE_LOCK:
+            cached = _BLOCK_CACHE.get(key)
+            if cached is not None:
+                _BLOCK_CACHE.move_to_end(key)
+                return cached
+
+        if redaction_type in ("generic", "remove"):
+            sanitized_text, summary, unique_pii = self._fast_rewrite(
+                text, redaction_type
+            )
+        else:
+            result = self.sanitize_text(text, redaction_type)
+            sanitized_text = result["sanitized_text"]
+            summary = result["detection_summary"]
+            unique_pii = {
+                finding["value"]
+                for block in summary["detailed_findings"].values()
+                for finding in block
+            }
+        cached = (sanitized_text, summary, frozenset(unique_pii))
+        with _BLOCK_CACHE_LOCK:
+            _BLOCK_CACHE[key] = cached
+            if len(_BLOCK_CACHE) > _BLOCK_CACHE_SIZE:
+                _BLOCK_CACHE.popitem(last=False)
+        return cached
+
+    def _fast_sanitize(self, text, redaction_type):
+        """Detect and redact in one pass, skipping the full detector."""
+        sanitized_text, detection_summary, _ = self._fast_rewrite(
+            text, redaction_type
+        )
+        count = detection_summary["total_detections"]
+        if count and redaction_type == "remove":
+            sanitized_text = _WHITESPACE_RE.sub(" ", sanitized_text).strip()
 
-        # SSN masking
-        ssn_pattern = r"\b(\d{3})-(\d{2})-(\d{4})\b"
+        return {
+            "sanitized_text": sanitized_text,
+            "original_text": text,
+            "pii_detected": count > 0,
+            "detection_summary": detection_summary,
+            "redaction_type": redaction_type,
+        }
 
-        def mask_ssn(match):
-            return "***-**-****"
+    def _fast_rewrite(self, text, redaction_type):
+        """
+        Redact text in one regex pass, leaving whitespace untouched.
 
-        sanitized_text = re.sub(ssn_pattern, mask_ssn, sanitized_text)
+        Returns:
+            tuple: (rewritten text, detection summary, set of the distinct
+                PII values found)
+        """
+        redaction_patterns = self.redaction_patterns
+        categories = dict.fromkeys(_RAW_PATTERNS, 0)
+        unique_pii = set()
+
+        def redact(match, category):
+            categories[category] += 1
+            unique_pii.add(match.group())
+            if redaction_type == "remove":
+                return ""
+            return redaction_patterns.get(category, "[REDACTED]")
+
+        sanitized_text, count = _rewrite_pii(text, redact)
+        detection_summary = {
+            "total_detections": count,
+            "categories": categories,
+            "unique_pii_count": len(unique_pii),
+            "detailed_findings": {},
+        }
+        return sanitized_text, detection_summary, unique_pii
 
-        # Credit card masking
-        cc_pattern = r"\b\d{4}-\d{4}-\d{4}-\d{4}\b|\b\d{16}\b"
+    def _apply_generic_redaction(self, text, detection_summary):
+        """Apply generic redaction using pattern matching."""
+        redaction_patterns = self.redaction_patterns
 
-        def mask_cc(match):
-            cc = match.group().replace("-", "")
-            if len(cc) == 16:
-                return cc[:4] + "-****-****-" + cc[-4:]
-            return "****-****-****-****"
+        def redact(match, category):
+            return redaction_patterns.get(category, "[REDACTED]")
 
-        sanitized_text = re.sub(cc_pattern, mask_cc, sanitized_text)
+        return _rewrite_pii(text, redact)[0]
 
-        return sanitized_text
+    def _apply_mask_redaction(self, text, detection_summary):
+        """Apply mask redaction (e.g., john@example.com -> j***@e***.com)."""
+        return _MASK_RE.sub(_mask_match, text)
 
     def _apply_removal_redaction(self, text, detection_summary):
         """Apply removal redaction (remove PII entirely)."""
-        sanitized_text = text
-
-        # Remove all PII patterns
-        for category, pattern in self.pii_patterns.items():
-            if (
-                category in detection_summary["categories"]
-                and detection_summary["categories"][category] > 0
-            ):
-                sanitized_text = re.sub(
-                    pattern, "", sanitized_text, flags=re.IGNORECASE
-                )
+        sanitized_text = _rewrite_pii(text, lambda match, category: "")[0]
 
         # Clean up extra whitespace
-        sanitized_text = re.sub(r"\s+", " ", sanitized_text).strip()
+        sanitized_text = _WHITESPACE_RE.sub(" ", sanitized_text).strip()
 
         return sanitized_text
 
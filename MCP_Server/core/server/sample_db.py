@@ -0,0 +1,56 @@
+"""
+Schema and sample records shared by the vulnerable servers and the demos.
+
+Kept free of MCP/FastAPI imports so the no-MCP demo can seed its database
+from the same source.
+"""
+
+CREATE_RECORDS_SQL = """
+    CREATE TABLE IF NOT EXISTS records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        address TEXT NOT NULL,
+        email TEXT,
+        phone TEXT,
+        credit_card TEXT
+    )
+"""
+
+INSERT_SQL = "INSERT INTO records (name, address, email, phone, credit_card) VALUES (?, ?, ?, ?, ?)"
+
+SAMPLE_ROWS: tuple[tuple[str, ...], ...] = (
+    (
+        "Alice Johnson",
+        "123 Main St",
+        "alice@example.com",
+        "555-0123",
+        "4532-1234-5678-9012",
+    ),
+    (
+        "Bob Smith",
+        "456 Oak Ave",
+        "bob@example.com",
+        "555-0456",
+        "5555-1234-5678-9012",
+    ),
+    (
+        "Carol Davis",
+        "789 Pine Rd",
+        "carol@example.com",
+        "555-0789",
+        "6011-1234-5678-9012",
+    ),
+)
+
+
+def seed_records(conn):
+    """Create the records table and reset it to the sample rows.
+
+    Runs as a single transaction on connections using the default
+    isolation level.
+    """
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute(CREATE_RECORDS_SQL)
+        cursor.execute("DELETE FROM records")
+        cursor.executemany(INSERT_SQL, SAMPLE_ROWS)
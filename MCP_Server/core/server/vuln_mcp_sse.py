@@ -3,18 +3,46 @@ import sqlite3
 import sys
 import asyncio
 import subprocess
-import requests
+import httpx
+import errno
 import hashlib
 import random
 import string
 import socket
 import psutil
 import json
+import logging
+import threading
+import time
+import queue
+from contextlib import contextmanager
 from pathlib import Path
 
-# Windows event loop fix for asyncio
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Prefer a libuv-based event loop when available; uvicorn is told to leave
+# winloop's policy alone and to use uvloop explicitly
+UVICORN_LOOP = "auto"
 if sys.platform == "win32":
-    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    try:
+        import winloop
+
+        winloop.install()
+        UVICORN_LOOP = "none"
+    except ImportError:
+        # Windows event loop fix for asyncio
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+else:
+    try:
+        import uvloop
+
+        uvloop.install()
+        UVICORN_LOOP = "uvloop"
+    except ImportError:
+        pass
 
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse, StreamingResponse
@@ -27,46 +55,217 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from agent.sanitizer_agent import SanitizerAgent
+from server.sample_db import CREATE_RECORDS_SQL, INSERT_SQL, seed_records
 
 # Database setup
 DB_NAME = "vulnerable_mcp_sse.db"
 
+# DB_IN_MEMORY=1 keeps the database in a shared-cache in-memory SQLite
+# instance instead of on disk. It lives as long as the writer connection,
+# i.e. for the lifetime of this process.
+DB_IN_MEMORY = os.environ.get("DB_IN_MEMORY") == "1"
+if DB_IN_MEMORY:
+    DB_URI = "file:vulndb?mode=memory&cache=shared"
+else:
+    DB_URI = f"file:{DB_NAME}"
+
+
+# Parametrized statements, prepared once and reused from SQLite's statement
+# cache. The injectable f-string versions stay the default; set DEMO_VULN=0
+# to run the tools against the safe statements instead.
+DEMO_VULN = os.environ.get("DEMO_VULN", "1") == "1"
+SEARCH_SQL = "SELECT * FROM records WHERE name LIKE ? OR address LIKE ?"
+
+
+# The environment and interpreter details do not change while the server
+# runs, so they are captured once instead of copied on every call
+_ENV_SNAPSHOT = dict(os.environ)
+_STATIC_SYSTEM_INFO = {
+    "platform": os.name,
+    "current_user": os.getenv("USER", os.getenv("USERNAME", "unknown")),
+    "python_version": sys.version,
+}
+
+
+def _dumps(obj, indent=False):
+    """Serialize obj to a JSON string, compact unless indent is set."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, default=str, option=option).decode()
+    if indent:
+        return json.dumps(obj, indent=2, default=str)
+    return json.dumps(obj, separators=(",", ":"), default=str)
+
+
+class ConnectionPool:
+    """Fixed set of open SQLite connections shared across requests."""
+
+    def __init__(self, db_uri, size, read_only=False):
+        self._connections = queue.Queue(maxsize=size)
+        for _ in range(size):
+            conn = sqlite3.connect(
+                db_uri, uri=True, check_same_thread=False, isolation_level=None
+            )
+            if read_only:
+                conn.execute("PRAGMA query_only=ON")
+                # Shared-cache readers would otherwise hit table locks
+                conn.execute("PRAGMA read_uncommitted=ON")
+            else:
+                # A no-op for in-memory databases
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-20000")
+            self._connections.put(conn)
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a connection, returning it to the pool afterwards."""
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+# SQLite allows one writer at a time; with WAL, readers run alongside it.
+# A pool of one connection doubles as the writer lock, and it is also the
+# connection that keeps an in-memory database alive.
+_WRITER = None
+_READERS = None
+
+
+def _writer_pool():
+    global _WRITER
+    if _WRITER is None:
+        _WRITER = ConnectionPool(DB_URI, 1)
+    return _WRITER
+
+
+def get_writer():
+    """Borrow the single read-write connection."""
+    return _writer_pool().acquire()
+
+
+def get_reader():
+    """Borrow one of the read-only connections."""
+    global _READERS
+    if _READERS is None:
+        # The writer creates the database and switches it to WAL first
+        _writer_pool()
+        _READERS = ConnectionPool(
+            DB_URI, min(32, (os.cpu_count() or 1) * 2), read_only=True
+        )
+    return _READERS.acquire()
+
+
+def close_pools():
+    for pool in (_READERS, _WRITER):
+        if pool is not None:
+            pool.close()
+
 
 def setup_database():
     """Create the SQLite database and table if they don't exist."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            address TEXT NOT NULL,
-            email TEXT,
-            phone TEXT,
-            credit_card TEXT
-        )
-    """
-    )
-    # Insert some sample data
-    cursor.execute("DELETE FROM records")
-    cursor.execute(
-        "INSERT INTO records (name, address, email, phone, credit_card) VALUES ('Alice Johnson', '123 Main St', 'alice@example.com', '555-0123', '4532-1234-5678-9012')"
-    )
-    cursor.execute(
-        "INSERT INTO records (name, address, email, phone, credit_card) VALUES ('Bob Smith', '456 Oak Ave', 'bob@example.com', '555-0456', '5555-1234-5678-9012')"
-    )
-    cursor.execute(
-        "INSERT INTO records (name, address, email, phone, credit_card) VALUES ('Carol Davis', '789 Pine Rd', 'carol@example.com', '555-0789', '6011-1234-5678-9012')"
-    )
-    conn.commit()
+    _writer_pool()
+    conn = sqlite3.connect(DB_URI, uri=True)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # One transaction for the whole reset instead of a commit per statement
+    seed_records(conn)
     conn.close()
 
 
 app = FastAPI()
 mcp = FastMCP("Vulnerable SSE MCP Server")
 
-print("[SERVER] Module loaded")
+# Debug tracing; silent unless LOG_LEVEL=DEBUG
+log = logging.getLogger("vuln_mcp_sse")
+
+log.debug("Module loaded")
+
+
+def _reset_records():
+    """Empty the records table, recreating it if an attack dropped it."""
+    with get_writer() as conn:
+        conn.execute(CREATE_RECORDS_SQL)
+        conn.execute("DELETE FROM records")
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'records'")
+
+
+def _run_sqli(payload):
+    """Run the injectable insert script and report whether the table survived."""
+    try:
+        with get_writer() as conn:
+            cursor = conn.cursor()
+            cursor.executescript(
+                f"INSERT INTO records (name, address) VALUES ('{payload['name']}', '{payload['address']}')"
+            )
+            # Try to query the table after attack
+            try:
+                cursor.execute("SELECT * FROM records")
+                rows = cursor.fetchall()
+                return {"sqli": "failed", "rows": rows}
+            except Exception as e:
+                return {"sqli": "success", "error": str(e)}
+    except Exception as e:
+        return {"sqli": "success", "error": str(e)}
+
+
+def _read_text(file_path):
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def _write_text(file_path, content):
+    with open(file_path, "w") as f:
+        f.write(content)
+
+
+def _read_head(file_path, limit=1000):
+    """Read at most limit bytes from the start of a file."""
+    with open(file_path, "rb") as f:
+        return f.read(limit).decode("utf-8", "ignore")
+
+
+async def _run_shell(command, timeout):
+    """Run a shell command without blocking the event loop."""
+    try:
+        proc = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except NotImplementedError:
+        # The selector loop used on Windows has no subprocess support
+        result = await asyncio.to_thread(
+            subprocess.run,
+            command,
+            shell=True,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        return result.returncode, result.stdout, result.stderr
+
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise subprocess.TimeoutExpired(command, timeout)
+    return (
+        proc.returncode,
+        stdout.decode(errors="replace"),
+        stderr.decode(errors="replace"),
+    )
+
+
+# Shared async HTTP client for the SSRF demo
+_HTTP_ASYNC = httpx.AsyncClient(timeout=5, follow_redirects=True)
 
 
 # Attack endpoint for direct exploitation
@@ -77,28 +276,12 @@ async def attack_endpoint(request: Request):
     attack_type = data.get("attack_type")
 
     # Always reset database for consistent testing
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        cursor.execute("DROP TABLE IF EXISTS records")
-        cursor.execute(
-            """
-            CREATE TABLE records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                address TEXT NOT NULL,
-                email TEXT,
-                phone TEXT,
-                credit_card TEXT
-            )
-        """
-        )
-        conn.commit()
+        await asyncio.to_thread(_reset_records)
     except Exception as e:
         return JSONResponse(
             {"error": f"Table recreate error: {e}"}, status_code=500
         )
-    conn.close()
 
     if attack_type == "sqli":
         # SQL Injection attack
@@ -109,23 +292,7 @@ async def attack_endpoint(request: Request):
                 "address": "hacked",
             },
         )
-        try:
-            conn = sqlite3.connect(DB_NAME)
-            cursor = conn.cursor()
-            cursor.executescript(
-                f"INSERT INTO records (name, address) VALUES ('{payload['name']}', '{payload['address']}')"
-            )
-            conn.commit()
-            # Try to query the table after attack
-            try:
-                cursor.execute("SELECT * FROM records")
-                rows = cursor.fetchall()
-                result = {"sqli": "failed", "rows": rows}
-            except Exception as e:
-                result = {"sqli": "success", "error": str(e)}
-            conn.close()
-        except Exception as e:
-            result = {"sqli": "success", "error": str(e)}
+        result = await asyncio.to_thread(_run_sqli, payload)
         return JSONResponse(result)
 
     elif attack_type == "env":
@@ -136,26 +303,21 @@ async def attack_endpoint(request: Request):
     elif attack_type == "file_read":
         file_path = data.get("file_path", "/etc/passwd")
         try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-            return JSONResponse(
-                {"file_path": file_path, "content": content[:1000]}
-            )
+            content = await asyncio.to_thread(_read_head, file_path)
+            return JSONResponse({"file_path": file_path, "content": content})
         except Exception as e:
             return JSONResponse({"file_path": file_path, "error": str(e)})
 
     elif attack_type == "command":
         command = data.get("command", "whoami")
         try:
-            result = subprocess.run(
-                command, shell=True, capture_output=True, text=True, timeout=10
-            )
+            returncode, stdout, stderr = await _run_shell(command, timeout=10)
             return JSONResponse(
                 {
                     "command": command,
-                    "exit_code": result.returncode,
-                    "stdout": result.stdout,
-                    "stderr": result.stderr,
+                    "exit_code": returncode,
+                    "stdout": stdout,
+                    "stderr": stderr,
                 }
             )
         except Exception as e:
@@ -164,7 +326,7 @@ async def attack_endpoint(request: Request):
     elif attack_type == "ssrf":
         url = data.get("url", "http://localhost:22")
         try:
-            response = requests.get(url, timeout=5)
+            response = await _HTTP_ASYNC.get(url)
             return JSONResponse(
                 {
                     "url": url,
@@ -181,43 +343,48 @@ async def attack_endpoint(request: Request):
 
 # SSE test endpoints
 @app.get("/ping")
-def ping():
-    print("[SERVER] /ping endpoint called")
+async def ping():
+    log.debug("/ping endpoint called")
     return {"pong": True}
 
 
 @app.get("/sse-test/")
 async def sse_test():
-    print("[SERVER] /sse-test/ endpoint entered")
+    log.debug("/sse-test/ endpoint entered")
+
+    # Frame pieces are encoded once; each tick only formats the numbers
+    prefix = b'data: {"mcp_event": "update", "count": '
+    mid = b', "timestamp": '
+    suffix = b"}\n\n"
 
     async def event_gen():
         i = 0
         while True:
             await asyncio.sleep(1)
             i += 1
-            message = {
-                "mcp_event": "update",
-                "count": i,
-                "timestamp": asyncio.get_event_loop().time(),
-            }
-            yield f"data: {json.dumps(message)}\n\n"
-            print(f"[SERVER] /sse-test/ yielding message {i}")
+            yield (
+                prefix
+                + str(i).encode()
+                + mid
+                + repr(time.monotonic()).encode()
+                + suffix
+            )
 
     return EventSourceResponse(event_gen())
 
 
 @app.get("/sse-test2/")
 async def sse_test2():
-    print("[SERVER] /sse-test2/ endpoint entered")
+    log.debug("/sse-test2/ endpoint entered")
+
+    template = b"data: starlette test message %d\n\n"
 
     async def event_gen():
-        print("[SERVER] /sse-test2/ generator created")
+        log.debug("/sse-test2/ generator created")
         i = 0
         while True:
             await asyncio.sleep(1)
-            msg = f"data: starlette test message {i}\n\n"
-            print(f"[SERVER] /sse-test2/ yielding: {msg.strip()}")
-            yield msg.encode()
+            yield template % i
             i += 1
 
     return StreamingResponse(event_gen(), media_type="text/event-stream")
@@ -232,10 +399,19 @@ app.mount("/sse", create_sse_server(mcp))
 @app.on_event("startup")
 def on_startup():
     setup_database()
+    with get_reader():
+        pass
+    get_agent()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    close_pools()
+    await _HTTP_ASYNC.aclose()
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {
         "message": "Vulnerable MCP SSE Server",
         "endpoints": {
@@ -259,47 +435,56 @@ def insert_record(
     credit_card: str = "",
 ) -> str:
     """Insert a new record into the database with SQL injection vulnerability."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            f"INSERT INTO records (name, address, email, phone, credit_card) VALUES ('{name}', '{address}', '{email}', '{phone}', '{credit_card}')"
-        )
-        conn.commit()
-        result = f"Record inserted: {name}, {address}, {email}, {phone}, {credit_card}"
-    except Exception as e:
-        result = f"SQL ERROR: {e}"
-    conn.close()
+    with get_writer() as conn:
+        cursor = conn.cursor()
+        try:
+            if DEMO_VULN:
+                cursor.execute(
+                    f"INSERT INTO records (name, address, email, phone, credit_card) VALUES ('{name}', '{address}', '{email}', '{phone}', '{credit_card}')"
+                )
+            else:
+                cursor.execute(
+                    INSERT_SQL, (name, address, email, phone, credit_card)
+                )
+            result = f"Record inserted: {name}, {address}, {email}, {phone}, {credit_card}"
+        except Exception as e:
+            result = f"SQL ERROR: {e}"
     return result
 
 
 @mcp.tool()
 def execute_sql(query: str) -> str:
     """Execute arbitrary SQL queries with no restrictions."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    result = cursor.execute(query).fetchall()
-    conn.commit()
-    conn.close()
-    return str(result)
+    # Plain SELECTs can run on a reader; everything else needs the writer
+    if query.lstrip().upper().startswith("SELECT"):
+        connection = get_reader()
+    else:
+        connection = get_writer()
+    with connection as conn:
+        result = conn.execute(query).fetchall()
+    return _dumps(result)
 
 
 @mcp.tool()
 def search_records(search_term: str) -> str:
     """Search records with SQL injection vulnerability."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(
-        f"SELECT * FROM records WHERE name LIKE '%{search_term}%' OR address LIKE '%{search_term}%'"
-    )
-    rows = cursor.fetchall()
-    conn.close()
-    return "\n".join(
-        [
-            f"ID: {row[0]}, Name: {row[1]}, Address: {row[2]}, Email: {row[3]}, Phone: {row[4]}, CC: {row[5]}"
-            for row in rows
-        ]
-    )
+    with get_reader() as conn:
+        cursor = conn.cursor()
+        if DEMO_VULN:
+            cursor.execute(
+                f"SELECT * FROM records WHERE name LIKE '%{search_term}%' OR address LIKE '%{search_term}%'"
+            )
+        else:
+            pattern = f"%{search_term}%"
+            cursor.execute(SEARCH_SQL, (pattern, pattern))
+        try:
+            # Format rows straight off the cursor instead of fetchall()
+            return "\n".join(
+                f"ID: {row[0]}, Name: {row[1]}, Address: {row[2]}, Email: {row[3]}, Phone: {row[4]}, CC: {row[5]}"
+                for row in cursor
+            )
+        finally:
+            cursor.close()
 
 
 @mcp.tool()
@@ -311,38 +496,37 @@ def get_env_variable(var_name: str) -> str:
 @mcp.tool()
 def list_all_env_vars() -> str:
     """List all environment variables (exposes sensitive information)."""
-    return json.dumps(dict(os.environ), indent=2)
+    return _dumps(_ENV_SNAPSHOT)
 
 
+# FastMCP runs plain def tools inline on the event loop, so tools that wait
+# on disk, sockets or subprocesses are async and push blocking calls to a
+# thread. Pure-CPU tools stay sync.
 @mcp.tool()
-def read_file(file_path: str) -> str:
+async def read_file(file_path: str) -> str:
     """Read any file from the filesystem (path traversal vulnerability)."""
     try:
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
+        return await asyncio.to_thread(_read_text, file_path)
     except Exception as e:
         return f"Error reading file: {e}"
 
 
 @mcp.tool()
-def write_file(file_path: str, content: str) -> str:
+async def write_file(file_path: str, content: str) -> str:
     """Write content to any file (path traversal vulnerability)."""
     try:
-        with open(file_path, "w") as f:
-            f.write(content)
+        await asyncio.to_thread(_write_text, file_path, content)
         return f"Content written to {file_path}"
     except Exception as e:
         return f"Error writing file: {e}"
 
 
 @mcp.tool()
-def execute_command(command: str) -> str:
+async def execute_command(command: str) -> str:
     """Execute arbitrary system commands."""
     try:
-        result = subprocess.run(
-            command, shell=True, capture_output=True, text=True, timeout=30
-        )
-        return f"Exit Code: {result.returncode}\nOutput: {result.stdout}\nError: {result.stderr}"
+        returncode, stdout, stderr = await _run_shell(command, timeout=30)
+        return f"Exit Code: {returncode}\nOutput: {stdout}\nError: {stderr}"
     except subprocess.TimeoutExpired:
         return "Command timed out"
     except Exception as e:
@@ -350,7 +534,7 @@ def execute_command(command: str) -> str:
 
 
 @mcp.tool()
-def make_request(
+async def make_request(
     url: str, method: str = "GET", data: str = "", headers: str = ""
 ) -> str:
     """Make HTTP requests to any URL (SSRF vulnerability)."""
@@ -359,62 +543,187 @@ def make_request(
         if headers:
             headers_dict = json.loads(headers)
 
-        response = requests.request(
-            method, url, data=data, headers=headers_dict, timeout=10
+        response = await _HTTP_ASYNC.request(
+            method, url, content=data or None, headers=headers_dict, timeout=10
         )
         return f"Status: {response.status_code}\nHeaders: {dict(response.headers)}\nContent: {response.text[:1000]}"
     except Exception as e:
         return f"Error making request: {e}"
 
 
+# Connection errors that mean nothing is listening; any other OSError
+# (e.g. EMFILE) is a failed probe, not a closed port
+_CLOSED_ERRNOS = frozenset(
+    (
+        errno.ECONNREFUSED,
+        errno.EHOSTUNREACH,
+        errno.ENETUNREACH,
+        errno.ETIMEDOUT,
+    )
+)
+
+
+def _scan_concurrency(cap=256):
+    """Probes in flight at once per scan, kept well under the fd limit."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return cap
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return cap
+    return max(1, min(cap, soft // 4))
+
+
+_SCAN_CONCURRENCY = _scan_concurrency()
+
+
+async def _resolve(host):
+    """Resolve host once to the IPv4 address every probe connects to."""
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        host, None, family=socket.AF_INET, type=socket.SOCK_STREAM
+    )
+    return infos[0][4][0]
+
+
+async def _probe(address, port, timeout=5):
+    """Return "Open" if a TCP connection to address:port succeeds in time."""
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(address, port), timeout
+        )
+    except asyncio.TimeoutError:
+        return "Closed"
+    except OSError as e:
+        if isinstance(e, ConnectionRefusedError) or e.errno in _CLOSED_ERRNOS:
+            return "Closed"
+        raise
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return "Open"
+
+
+async def _probe_all(host, ports, timeout=5):
+    """Probe ports on host with at most _SCAN_CONCURRENCY sockets open."""
+    address = await _resolve(host)
+    limit = asyncio.Semaphore(_SCAN_CONCURRENCY)
+
+    async def probe(port):
+        async with limit:
+            return await _probe(address, port, timeout)
+
+    return await asyncio.gather(*map(probe, ports))
+
+
 @mcp.tool()
-def scan_port(host: str, port: int) -> str:
+async def scan_port(host: str, port: int) -> str:
     """Scan a port on any host."""
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(5)
-        result = sock.connect_ex((host, port))
-        sock.close()
-        return "Open" if result == 0 else "Closed"
+        return await _probe(await _resolve(host), port)
     except Exception as e:
         return f"Error scanning port: {e}"
 
 
+@mcp.tool()
+async def scan_ports(host: str, ports: list[int]) -> str:
+    """Scan several ports on any host concurrently."""
+    try:
+        results = await _probe_all(host, ports)
+        return json.dumps(dict(zip(ports, results)))
+    except Exception as e:
+        return f"Error scanning ports: {e}"
+
+
+# Constructors for the common algorithms, looked up once at import
+_HASHERS = {
+    name: getattr(hashlib, name) for name in hashlib.algorithms_guaranteed
+}
+
+
 @mcp.tool()
 def generate_hash(data: str, algorithm: str = "md5") -> str:
     """Generate hash using weak algorithms."""
     try:
-        hasher = getattr(hashlib, algorithm)()
-        hasher.update(data.encode())
-        return hasher.hexdigest()
+        hasher = _HASHERS.get(algorithm) or getattr(hashlib, algorithm)
+        return hasher(data.encode("utf-8", "surrogatepass")).hexdigest()
     except Exception as e:
         return f"Error generating hash: {e}"
 
 
+def _file_digest(f, algorithm):
+    """hashlib.file_digest, with a chunked fallback before Python 3.11."""
+    digest = _HASHERS.get(algorithm, algorithm)
+    if hasattr(hashlib, "file_digest"):
+        return hashlib.file_digest(f, digest)
+
+    hasher = digest() if callable(digest) else hashlib.new(digest)
+    buf = bytearray(2**18)
+    view = memoryview(buf)
+    while size := f.readinto(buf):
+        hasher.update(view[:size])
+    return hasher
+
+
+@mcp.tool()
+def hash_file(path: str, algorithm: str = "sha256") -> str:
+    """Hash a file on disk without loading it into memory."""
+    try:
+        with open(path, "rb") as f:
+            return _file_digest(f, algorithm).hexdigest()
+    except Exception as e:
+        return f"Error hashing file: {e}"
+
+
 @mcp.tool()
 def get_system_info() -> str:
     """Get detailed system information."""
     try:
         info = {
-            "platform": os.name,
-            "current_user": os.getenv("USER", os.getenv("USERNAME", "unknown")),
+            **_STATIC_SYSTEM_INFO,
             "current_directory": os.getcwd(),
-            "python_version": sys.version,
-            "environment_variables": dict(os.environ),
+            "environment_variables": _ENV_SNAPSHOT,
         }
-        return json.dumps(info, indent=2)
+        return _dumps(info)
     except Exception as e:
         return f"Error getting system info: {e}"
 
 
 # PII Sanitization Tools
+_AGENT = None
+_AGENT_LOCK = threading.Lock()
+
+
+def get_agent():
+    """Return the shared SanitizerAgent, creating it on first use."""
+    global _AGENT
+    if _AGENT is None:
+        with _AGENT_LOCK:
+            if _AGENT is None:
+                _AGENT = SanitizerAgent()
+    return _AGENT
+
+
 @mcp.tool()
 def detect_pii(text: str) -> str:
     """Detect PII in the given text using enhanced detection methods."""
     try:
-        agent = SanitizerAgent()
+        agent = get_agent()
         detection_summary = agent.detect_pii(text)
-        return json.dumps(detection_summary, indent=2)
+        return _dumps(detection_summary, indent=True)
+    except Exception as e:
+        return f"Error detecting PII: {e}"
+
+
+@mcp.tool()
+def detect_pii_batch(texts: list[str]) -> str:
+    """Detect PII in several texts at once, batching the NLP pass."""
+    try:
+        agent = get_agent()
+        summaries = agent.detect_pii_batch(texts)
+        return _dumps(summaries, indent=True)
     except Exception as e:
         return f"Error detecting PII: {e}"
 
@@ -423,9 +732,9 @@ def detect_pii(text: str) -> str:
 def sanitize_text(text: str, redaction_type: str = "generic") -> str:
     """Sanitize text by redacting detected PII. Options: generic, mask, remove."""
     try:
-        agent = SanitizerAgent()
+        agent = get_agent()
         result = agent.sanitize_text(text, redaction_type)
-        return json.dumps(result, indent=2)
+        return _dumps(result, indent=True)
     except Exception as e:
         return f"Error sanitizing text: {e}"
 
@@ -434,44 +743,58 @@ def sanitize_text(text: str, redaction_type: str = "generic") -> str:
 def get_sanitization_report(text: str) -> str:
     """Get a detailed report of what PII would be detected and sanitized."""
     try:
-        agent = SanitizerAgent()
+        agent = get_agent()
         report = agent.get_sanitization_report(text)
-        return json.dumps(report, indent=2)
+        return _dumps(report, indent=True)
     except Exception as e:
         return f"Error generating sanitization report: {e}"
 
 
+def _sanitize_file(file_path, sanitized_path, redaction_type):
+    # Stream sanitized content into a new file, 1 MB of lines at a time
+    with open(
+        file_path, "r", encoding="utf-8", errors="ignore", buffering=1 << 20
+    ) as src, open(
+        sanitized_path, "w", encoding="utf-8", buffering=1 << 20
+    ) as dst:
+        return get_agent().sanitize_stream(src, dst, redaction_type)
+
+
 @mcp.tool()
-def sanitize_file(file_path: str, redaction_type: str = "generic") -> str:
+async def sanitize_file(file_path: str, redaction_type: str = "generic") -> str:
     """Sanitize a file by redacting detected PII. Returns sanitized content."""
     try:
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read()
-
-        agent = SanitizerAgent()
-        result = agent.sanitize_text(content, redaction_type)
-
-        # Write sanitized content to a new file
         sanitized_path = file_path + ".sanitized"
-        with open(sanitized_path, "w", encoding="utf-8") as f:
-            f.write(result["sanitized_text"])
+        summary = await asyncio.to_thread(
+            _sanitize_file, file_path, sanitized_path, redaction_type
+        )
 
-        return json.dumps(
+        return _dumps(
             {
                 "original_file": file_path,
                 "sanitized_file": sanitized_path,
-                "pii_detected": result["pii_detected"],
-                "detection_summary": result["detection_summary"],
+                "pii_detected": summary["total_detections"] > 0,
+                "detection_summary": summary,
             },
-            indent=2,
+            indent=True,
         )
     except Exception as e:
         return f"Error sanitizing file: {e}"
 
 
 if __name__ == "__main__":
-    setup_database()
-    print("[SERVER] Starting FastAPI app on port 9000...")
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING").upper())
+
+    # MCP SSE sessions live in process memory, so a client's stream and its
+    # POSTs must reach the same worker; only raise WORKERS behind a sticky
+    # load balancer. The database is set up by each worker's startup hook.
+    workers = int(os.environ.get("WORKERS", "1"))
+    if workers > 1 and DB_IN_MEMORY:
+        log.warning(
+            "DB_IN_MEMORY gives every worker its own private database; "
+            "records will not be shared between workers"
+        )
+    print(f"[SERVER] Starting FastAPI app on port 9000 ({workers} worker(s))...")
     print("Available endpoints:")
     print("- POST /attack - Direct attack endpoint")
     print("- GET /ping - Health check")
@@ -481,4 +804,13 @@ if __name__ == "__main__":
     print("Attack types: sqli, env, file_read, command, ssrf")
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=9000)
+    uvicorn.run(
+        # Workers import the app themselves, which needs an import string
+        "vuln_mcp_sse:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=9000,
+        workers=workers,
+        loop=UVICORN_LOOP,
+        access_log=False,
+        log_level="warning",
+    )
@@ -1,22 +1,33 @@
 from mcp.server.fastmcp import FastMCP
 import sqlite3
+import asyncio
+import atexit
 import os
 import subprocess
 import requests
+from requests.adapters import HTTPAdapter
+import errno
 import hashlib
 import random
 import string
 import socket
 import psutil
 import json
+import threading
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Import the sanitizer agent
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from agent.sanitizer_agent import SanitizerAgent
+from server.sample_db import INSERT_SQL, seed_records
 
 # Initialize the MCP server
 mcp = FastMCP("Vulnerable MCP Server")
@@ -25,34 +36,41 @@ mcp = FastMCP("Vulnerable MCP Server")
 DB_NAME = "vulnerable_mcp.db"
 
 
+# Parametrized statements, prepared once and reused from SQLite's statement
+# cache. The injectable f-string versions stay the default; set DEMO_VULN=0
+# to run the tools against the safe statements instead.
+DEMO_VULN = os.environ.get("DEMO_VULN", "1") == "1"
+SEARCH_SQL = "SELECT * FROM records WHERE name LIKE ? OR address LIKE ?"
+
+
+# The environment and interpreter details do not change while the server
+# runs, so they are captured once instead of copied on every call
+_ENV_SNAPSHOT = dict(os.environ)
+_STATIC_SYSTEM_INFO = {
+    "platform": os.name,
+    "current_user": os.getenv("USER", os.getenv("USERNAME", "unknown")),
+    "python_version": sys.version,
+    "cpu_count": os.cpu_count(),
+}
+
+
+def _dumps(obj, indent=False):
+    """Serialize obj to a JSON string, compact unless indent is set."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, default=str, option=option).decode()
+    if indent:
+        return json.dumps(obj, indent=2, default=str)
+    return json.dumps(obj, separators=(",", ":"), default=str)
+
+
 def setup_database():
     """Create the SQLite database and table if they don't exist."""
     conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            address TEXT NOT NULL,
-            email TEXT,
-            phone TEXT,
-            credit_card TEXT
-        )
-    """
-    )
-    # Insert some sample data
-    cursor.execute("DELETE FROM records")
-    cursor.execute(
-        "INSERT INTO records (name, address, email, phone, credit_card) VALUES ('Alice Johnson', '123 Main St', 'alice@example.com', '555-0123', '4532-1234-5678-9012')"
-    )
-    cursor.execute(
-        "INSERT INTO records (name, address, email, phone, credit_card) VALUES ('Bob Smith', '456 Oak Ave', 'bob@example.com', '555-0456', '5555-1234-5678-9012')"
-    )
-    cursor.execute(
-        "INSERT INTO records (name, address, email, phone, credit_card) VALUES ('Carol Davis', '789 Pine Rd', 'carol@example.com', '555-0789', '6011-1234-5678-9012')"
-    )
-    conn.commit()
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # One transaction for the whole reset instead of a commit per statement
+    seed_records(conn)
     conn.close()
 
 
@@ -68,9 +86,12 @@ def insert_record(
     """Insert a new record into the database with SQL injection vulnerability."""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute(
-        f"INSERT INTO records (name, address, email, phone, credit_card) VALUES ('{name}', '{address}', '{email}', '{phone}', '{credit_card}')"
-    )
+    if DEMO_VULN:
+        cursor.execute(
+            f"INSERT INTO records (name, address, email, phone, credit_card) VALUES ('{name}', '{address}', '{email}', '{phone}', '{credit_card}')"
+        )
+    else:
+        cursor.execute(INSERT_SQL, (name, address, email, phone, credit_card))
     conn.commit()
     conn.close()
     return (
@@ -86,7 +107,7 @@ def execute_sql(query: str) -> str:
     result = cursor.execute(query).fetchall()
     conn.commit()
     conn.close()
-    return str(result)
+    return _dumps(result)
 
 
 @mcp.tool()
@@ -94,17 +115,22 @@ def search_records(search_term: str) -> str:
     """Search records with SQL injection vulnerability."""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute(
-        f"SELECT * FROM records WHERE name LIKE '%{search_term}%' OR address LIKE '%{search_term}%'"
-    )
-    rows = cursor.fetchall()
-    conn.close()
-    return "\n".join(
-        [
+    if DEMO_VULN:
+        cursor.execute(
+            f"SELECT * FROM records WHERE name LIKE '%{search_term}%' OR address LIKE '%{search_term}%'"
+        )
+    else:
+        pattern = f"%{search_term}%"
+        cursor.execute(SEARCH_SQL, (pattern, pattern))
+    try:
+        # Format rows straight off the cursor instead of fetchall()
+        return "\n".join(
             f"ID: {row[0]}, Name: {row[1]}, Address: {row[2]}, Email: {row[3]}, Phone: {row[4]}, CC: {row[5]}"
-            for row in rows
-        ]
-    )
+            for row in cursor
+        )
+    finally:
+        cursor.close()
+        conn.close()
 
 
 # Environment Variable Exposure
@@ -117,7 +143,7 @@ def get_env_variable(var_name: str) -> str:
 @mcp.tool()
 def list_all_env_vars() -> str:
     """List all environment variables (exposes sensitive information)."""
-    return json.dumps(dict(os.environ), indent=2)
+    return _dumps(_ENV_SNAPSHOT)
 
 
 # File System Vulnerabilities
@@ -202,6 +228,17 @@ def list_processes() -> str:
 
 
 # Network Vulnerabilities (SSRF)
+# Keep-alive session reused by make_request
+_HTTP = requests.Session()
+_HTTP.mount(
+    "http://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0)
+)
+_HTTP.mount(
+    "https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0)
+)
+atexit.register(_HTTP.close)
+
+
 @mcp.tool()
 def make_request(
     url: str, method: str = "GET", data: str = "", headers: str = ""
@@ -212,7 +249,7 @@ def make_request(
         if headers:
             headers_dict = json.loads(headers)
 
-        response = requests.request(
+        response = _HTTP.request(
             method, url, data=data, headers=headers_dict, timeout=10
         )
         return f"Status: {response.status_code}\nHeaders: {dict(response.headers)}\nContent: {response.text[:1000]}"
@@ -220,48 +257,145 @@ def make_request(
         return f"Error making request: {e}"
 
 
+# Connection errors that mean nothing is listening; any other OSError
+# (e.g. EMFILE) is a failed probe, not a closed port
+_CLOSED_ERRNOS = frozenset(
+    (
+        errno.ECONNREFUSED,
+        errno.EHOSTUNREACH,
+        errno.ENETUNREACH,
+        errno.ETIMEDOUT,
+    )
+)
+
+
+def _scan_concurrency(cap=256):
+    """Probes in flight at once per scan, kept well under the fd limit."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return cap
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return cap
+    return max(1, min(cap, soft // 4))
+
+
+_SCAN_CONCURRENCY = _scan_concurrency()
+
+
+async def _resolve(host):
+    """Resolve host once to the IPv4 address every probe connects to."""
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        host, None, family=socket.AF_INET, type=socket.SOCK_STREAM
+    )
+    return infos[0][4][0]
+
+
+async def _probe(address, port, timeout=5):
+    """Return "Open" if a TCP connection to address:port succeeds in time."""
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(address, port), timeout
+        )
+    except asyncio.TimeoutError:
+        return "Closed"
+    except OSError as e:
+        if isinstance(e, ConnectionRefusedError) or e.errno in _CLOSED_ERRNOS:
+            return "Closed"
+        raise
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return "Open"
+
+
+async def _probe_all(host, ports, timeout=5):
+    """Probe ports on host with at most _SCAN_CONCURRENCY sockets open."""
+    address = await _resolve(host)
+    limit = asyncio.Semaphore(_SCAN_CONCURRENCY)
+
+    async def probe(port):
+        async with limit:
+            return await _probe(address, port, timeout)
+
+    return await asyncio.gather(*map(probe, ports))
+
+
 @mcp.tool()
-def scan_port(host: str, port: int) -> str:
+async def scan_port(host: str, port: int) -> str:
     """Scan a port on any host."""
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(5)
-        result = sock.connect_ex((host, port))
-        sock.close()
-        return "Open" if result == 0 else "Closed"
+        return await _probe(await _resolve(host), port)
     except Exception as e:
         return f"Error scanning port: {e}"
 
 
 @mcp.tool()
-def port_scan_range(host: str, start_port: int, end_port: int) -> str:
+async def scan_ports(host: str, ports: list[int]) -> str:
+    """Scan several ports on any host concurrently."""
+    try:
+        results = await _probe_all(host, ports)
+        return json.dumps(dict(zip(ports, results)))
+    except Exception as e:
+        return f"Error scanning ports: {e}"
+
+
+@mcp.tool()
+async def port_scan_range(host: str, start_port: int, end_port: int) -> str:
     """Scan a range of ports on any host."""
-    open_ports = []
-    for port in range(start_port, end_port + 1):
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex((host, port))
-            if result == 0:
-                open_ports.append(port)
-            sock.close()
-        except:
-            pass
+    ports = range(start_port, end_port + 1)
+    try:
+        results = await _probe_all(host, ports, timeout=1)
+    except Exception as e:
+        return f"Error scanning ports: {e}"
+    open_ports = [port for port, r in zip(ports, results) if r == "Open"]
     return f"Open ports on {host}: {open_ports}"
 
 
 # Cryptographic Weaknesses
+# Constructors for the common algorithms, looked up once at import
+_HASHERS = {
+    name: getattr(hashlib, name) for name in hashlib.algorithms_guaranteed
+}
+
+
 @mcp.tool()
 def generate_hash(data: str, algorithm: str = "md5") -> str:
     """Generate hash using weak algorithms."""
     try:
-        hasher = getattr(hashlib, algorithm)()
-        hasher.update(data.encode())
-        return hasher.hexdigest()
+        hasher = _HASHERS.get(algorithm) or getattr(hashlib, algorithm)
+        return hasher(data.encode("utf-8", "surrogatepass")).hexdigest()
     except Exception as e:
         return f"Error generating hash: {e}"
 
 
+def _file_digest(f, algorithm):
+    """hashlib.file_digest, with a chunked fallback before Python 3.11."""
+    digest = _HASHERS.get(algorithm, algorithm)
+    if hasattr(hashlib, "file_digest"):
+        return hashlib.file_digest(f, digest)
+
+    hasher = digest() if callable(digest) else hashlib.new(digest)
+    buf = bytearray(2**18)
+    view = memoryview(buf)
+    while size := f.readinto(buf):
+        hasher.update(view[:size])
+    return hasher
+
+
+@mcp.tool()
+def hash_file(path: str, algorithm: str = "sha256") -> str:
+    """Hash a file on disk without loading it into memory."""
+    try:
+        with open(path, "rb") as f:
+            return _file_digest(f, algorithm).hexdigest()
+    except Exception as e:
+        return f"Error hashing file: {e}"
+
+
 @mcp.tool()
 def generate_token(length: int = 8) -> str:
     """Generate weak random token."""
@@ -292,7 +426,7 @@ def connect_database(connection_string: str, query: str) -> str:
         cursor = conn.cursor()
         result = cursor.execute(query).fetchall()
         conn.close()
-        return str(result)
+        return _dumps(result)
     except Exception as e:
         return f"Error connecting to database: {e}"
 
@@ -303,19 +437,16 @@ def get_system_info() -> str:
     """Get detailed system information."""
     try:
         info = {
-            "platform": os.name,
-            "current_user": os.getenv("USER", os.getenv("USERNAME", "unknown")),
+            **_STATIC_SYSTEM_INFO,
             "current_directory": os.getcwd(),
-            "python_version": os.sys.version,
-            "environment_variables": dict(os.environ),
-            "cpu_count": os.cpu_count(),
+            "environment_variables": _ENV_SNAPSHOT,
             "memory_info": (
                 dict(psutil.virtual_memory()._asdict())
                 if hasattr(psutil, "virtual_memory")
                 else "N/A"
             ),
         }
-        return json.dumps(info, indent=2)
+        return _dumps(info)
     except Exception as e:
         return f"Error getting system info: {e}"
 
@@ -366,13 +497,38 @@ def read_logs(log_file: str = "sensitive.log") -> str:
 
 
 # PII Sanitization Tools
+_AGENT = None
+_AGENT_LOCK = threading.Lock()
+
+
+def get_agent():
+    """Return the shared SanitizerAgent, creating it on first use."""
+    global _AGENT
+    if _AGENT is None:
+        with _AGENT_LOCK:
+            if _AGENT is None:
+                _AGENT = SanitizerAgent()
+    return _AGENT
+
+
 @mcp.tool()
 def detect_pii(text: str) -> str:
     """Detect PII in the given text using enhanced detection methods."""
     try:
-        agent = SanitizerAgent()
+        agent = get_agent()
         detection_summary = agent.detect_pii(text)
-        return json.dumps(detection_summary, indent=2)
+        return _dumps(detection_summary, indent=True)
+    except Exception as e:
+        return f"Error detecting PII: {e}"
+
+
+@mcp.tool()
+def detect_pii_batch(texts: list[str]) -> str:
+    """Detect PII in several texts at once, batching the NLP pass."""
+    try:
+        agent = get_agent()
+        summaries = agent.detect_pii_batch(texts)
+        return _dumps(summaries, indent=True)
     except Exception as e:
         return f"Error detecting PII: {e}"
 
@@ -381,9 +537,9 @@ def detect_pii(text: str) -> str:
 def sanitize_text(text: str, redaction_type: str = "generic") -> str:
     """Sanitize text by redacting detected PII. Options: generic, mask, remove."""
     try:
-        agent = SanitizerAgent()
+        agent = get_agent()
         result = agent.sanitize_text(text, redaction_type)
-        return json.dumps(result, indent=2)
+        return _dumps(result, indent=True)
     except Exception as e:
         return f"Error sanitizing text: {e}"
 
@@ -392,9 +548,9 @@ def sanitize_text(text: str, redaction_type: str = "generic") -> str:
 def get_sanitization_report(text: str) -> str:
     """Get a detailed report of what PII would be detected and sanitized."""
     try:
-        agent = SanitizerAgent()
+        agent = get_agent()
         report = agent.get_sanitization_report(text)
-        return json.dumps(report, indent=2)
+        return _dumps(report, indent=True)
     except Exception as e:
         return f"Error generating sanitization report: {e}"
 
@@ -403,25 +559,25 @@ def get_sanitization_report(text: str) -> str:
 def sanitize_file(file_path: str, redaction_type: str = "generic") -> str:
     """Sanitize a file by redacting detected PII. Returns sanitized content."""
     try:
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read()
+        agent = get_agent()
 
-        agent = SanitizerAgent()
-        result = agent.sanitize_text(content, redaction_type)
-
-        # Write sanitized content to a new file
+        # Stream sanitized content into a new file, 1 MB of lines at a time
         sanitized_path = file_path + ".sanitized"
-        with open(sanitized_path, "w", encoding="utf-8") as f:
-            f.write(result["sanitized_text"])
-
-        return json.dumps(
+        with open(
+            file_path, "r", encoding="utf-8", errors="ignore", buffering=1 << 20
+        ) as src, open(
+            sanitized_path, "w", encoding="utf-8", buffering=1 << 20
+        ) as dst:
+            summary = agent.sanitize_stream(src, dst, redaction_type)
+
+        return _dumps(
             {
                 "original_file": file_path,
                 "sanitized_file": sanitized_path,
-                "pii_detected": result["pii_detected"],
-                "detection_summary": result["detection_summary"],
+                "pii_detected": summary["total_detections"] > 0,
+                "detection_summary": summary,
             },
-            indent=2,
+            indent=True,
         )
     except Exception as e:
         return f"Error sanitizing file: {e}"
@@ -429,6 +585,7 @@ def sanitize_file(file_path: str, redaction_type: str = "generic") -> str:
 
 if __name__ == "__main__":
     setup_database()
+    get_agent()
     print("Starting Vulnerable MCP Server with STDIO transport...")
     print("Available tools:")
     print("- insert_record: SQL injection vulnerability")
@@ -445,8 +602,10 @@ if __name__ == "__main__":
     print("- list_processes: Process enumeration")
     print("- make_request: SSRF vulnerability")
     print("- scan_port: Port scanning")
+    print("- scan_ports: Concurrent multi-port scanning")
     print("- port_scan_range: Port range scanning")
     print("- generate_hash: Weak cryptographic functions")
+    print("- hash_file: Hash arbitrary files")
     print("- generate_token: Weak random generation")
     print("- weak_encrypt: Weak encryption")
     print("- connect_database: Database connection vulnerability")
@@ -5,176 +5,385 @@ This version always calls detect_pii first, then uses Gemini for interpretation.
 """
 
 import asyncio
-import json
+import hashlib
 import os
 import sys
-from pathlib import Path
-
-# Add MCP to path
-sys.path.insert(0, str(Path(__file__).parent))
-
-try:
-    import google.generativeai as genai
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
-except ImportError as e:
-    print(f"Missing dependencies: {e}")
-    print("Installing required packages...")
-    import subprocess
-
-    subprocess.check_call(
-        [
-            sys.executable,
-            "-m",
-            "pip",
-            "install",
-            "google-generativeai",
-            "mcp",
-            "python-dotenv",
-        ]
-    )
-    import google.generativeai as genai
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
+import threading
+from collections import OrderedDict
+
+from gemini_common import (
+    ainput,
+    get_api_key,
+    get_gemini_model,
+    load_env_once,
+    loads,
+    new_event_loop,
+    require,
+    run,
+    stdio_server_params,
+)
+
+# Fail fast, naming every missing package, instead of installing at import
+require("google.generativeai", "mcp")
+
+from mcp import ClientSession  # noqa: E402
+from mcp.client.stdio import stdio_client  # noqa: E402
 
 # Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-
-    # Load .env from the master directory (parent of MCP_Server)
-    master_dir = Path(__file__).parent.parent.parent.parent
-    env_path = master_dir / ".env"
-    if env_path.exists():
-        load_dotenv(env_path)
-        print(f"✅ Loaded environment variables from {env_path}")
-    else:
-        print(f"⚠️  No .env file found at {env_path}")
-except ImportError:
-    print(
-        "⚠️  python-dotenv not installed, using system environment variables only"
-    )
+load_env_once()
+
+
+# Set GEMINI_VERBOSE=0 to leave out per-request diagnostics (categories,
+# finding details)
+VERBOSE = os.getenv("GEMINI_VERBOSE", "1") != "0"
+
+# Gemini interpretations of detection results, keyed by a digest of the
+# prompt. Only filled while INTERPRETATION_TEMPERATURE is 0, when the
+# same prompt gives the same answer.
+_INTERPRETATION_CACHE = OrderedDict()
+_INTERPRETATION_CACHE_SIZE = 1024
+
+
+class _MCPLoopRunner:
+    """
+    One background event loop per process for driving MCP from sync code.
+
+    Lets callers that already run their own loop (FastAPI, notebooks)
+    or no loop at all use the client without asyncio.run() per call.
+    Every sync call is scheduled on this same loop, so the MCP
+    sessions it opens are always used and closed there.
+    """
+
+    _loop = None
+    _thread = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def loop(cls):
+        """Return the shared loop, starting its thread on first use."""
+        with cls._lock:
+            if cls._loop is None:
+                cls._loop = new_event_loop()
+                cls._thread = threading.Thread(
+                    target=cls._loop.run_forever,
+                    name="mcp-loop",
+                    daemon=True,
+                )
+                cls._thread.start()
+        return cls._loop
+
+    @classmethod
+    def run(cls, coro, timeout=None):
+        """Run a coroutine on the shared loop and wait for its result."""
+        if threading.current_thread() is cls._thread:
+            coro.close()
+            raise RuntimeError("cannot block on the MCP loop from itself")
+        future = asyncio.run_coroutine_threadsafe(coro, cls.loop())
+        return future.result(timeout)
+
+
+class MCPMultiClient:
+    """
+    MCP sessions to several servers, started concurrently.
+
+    Each server is held open by its own task so the stdio client is
+    entered and exited in the same task, as anyio requires. Startup
+    therefore costs the slowest server's spawn time, not the sum.
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self._tasks = []
+        self._closing = asyncio.Event()
+
+    @classmethod
+    async def start(cls, params_by_name):
+        """Start every server in params_by_name and wait until all are ready."""
+        client = cls()
+        loop = asyncio.get_running_loop()
+        ready = {name: loop.create_future() for name in params_by_name}
+        client._tasks = [
+            asyncio.create_task(client._hold(name, params, ready[name]))
+            for name, params in params_by_name.items()
+        ]
+        try:
+            await asyncio.gather(*ready.values())
+        except BaseException:
+            await client.aclose()
+            raise
+        return client
+
+    async def _hold(self, name, params, ready):
+        """Open one session, publish it, and keep it open until aclose()."""
+        try:
+            async with stdio_client(params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.sessions[name] = session
+                    ready.set_result(session)
+                    await self._closing.wait()
+        except asyncio.CancelledError:
+            ready.cancel()
+            raise
+        except Exception as e:
+            if ready.done():
+                raise
+            ready.set_exception(e)
+        finally:
+            self.sessions.pop(name, None)
+
+    async def aclose(self):
+        """Close every session and stop the servers."""
+        self._closing.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
 
 
 class AutoDetectGeminiMCP:
     """Auto-detect PII without relying on Gemini for decision making."""
 
+    # Sampling temperature for interpretations; 0 makes them cacheable
+    INTERPRETATION_TEMPERATURE = 0.0
+
     def __init__(self):
         """Initialize Gemini."""
         # Get API key
-        api_key = os.getenv("GCP_KEY") or os.getenv("GEMINI_API_KEY")
+        api_key = get_api_key()
         if not api_key:
             raise ValueError("Please set GCP_KEY or GEMINI_API_KEY")
 
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
+        self.model = get_gemini_model(api_key)
 
-    def ask_gemini(self, prompt):
-        """Ask Gemini a question."""
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"❌ Gemini error: {e}"
+        self._server_params = stdio_server_params()
 
-    async def detect_pii(self, text):
-        """Always call detect_pii tool first."""
+        # One connect task per event loop: an MCP session can only be used
+        # on the loop that opened it, so the *_sync methods (which run on
+        # _MCPLoopRunner's loop) get their own
+        self._connect_tasks = {}
+
+        # Start the MCP server in the background when constructed inside
+        # a running loop, so the handshake overlaps with the first prompt
         try:
-            # Calculate correct path to MCP server
-            mcp_server_path = (
-                Path(__file__).parent.parent.parent
-                / "core"
-                / "server"
-                / "vuln_mcp_stdio.py"
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            self._start_connect()
+
+    async def connect(self):
+        """Start the MCP server and open a session on the running loop."""
+        return await MCPMultiClient.start({"sanitizer": self._server_params})
+
+    def _start_connect(self):
+        """Return the running loop's connect task, creating it if needed."""
+        loop = asyncio.get_running_loop()
+        task = self._connect_tasks.get(loop)
+        if task is None:
+            task = self._connect_tasks[loop] = loop.create_task(
+                self.connect()
             )
-            server_params = StdioServerParameters(
-                command="python",
-                args=[str(mcp_server_path)],
-                env={"PYTHONPATH": str(Path(__file__).parent.parent.parent)},
+        return task
+
+    async def _ensure_connected(self):
+        """Wait for this loop's background connect, starting it if needed."""
+        mcp = await self._start_connect()
+        return mcp.sessions["sanitizer"]
+
+    async def __aenter__(self):
+        """Begin connecting to the MCP server without waiting for it."""
+        self._start_connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Close the MCP session and stop the server."""
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Close this loop's MCP session, cancelling a connect in flight.
+
+        Sessions opened by the *_sync methods are closed by close_sync().
+        """
+        task = self._connect_tasks.pop(asyncio.get_running_loop(), None)
+        if task is None:
+            return
+        if not task.done():
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        if not task.cancelled() and task.exception() is None:
+            await task.result().aclose()
+
+    async def ask_gemini(self, prompt, echo=False, generation_config=None):
+        """
+        Ask Gemini a question without blocking the event loop.
+
+        With echo=True the reply is printed as "🤖 Gemini: ..." while it
+        streams in, instead of after the whole completion arrives.
+        generation_config is passed through to the model unchanged.
+        """
+        parts = []
+
+        def emit(text):
+            parts.append(text)
+            if echo:
+                print(text, end="", flush=True)
+
+        if echo:
+            print("🤖 Gemini: ", end="", flush=True)
+        try:
+            generate = getattr(self.model, "generate_content_async", None)
+            if generate is not None:
+                response = await generate(
+                    prompt, stream=True, generation_config=generation_config
+                )
+                async for chunk in response:
+                    emit(chunk.text)
+            else:
+                response = await asyncio.to_thread(
+                    self.model.generate_content,
+                    prompt,
+                    generation_config=generation_config,
+                )
+                emit(response.text)
+        except Exception as e:
+            parts.clear()
+            emit(f"❌ Gemini error: {e}")
+        if echo:
+            print()
+        return "".join(parts)
+
+    async def interpret(self, prompt):
+        """
+        Print Gemini's interpretation of a detection result.
+
+        Replies are cached by prompt while INTERPRETATION_TEMPERATURE is 0,
+        so repeating an input skips the Gemini round trip.
+        """
+        config = {"temperature": self.INTERPRETATION_TEMPERATURE}
+        if config["temperature"]:
+            return await self.ask_gemini(
+                prompt, echo=True, generation_config=config
             )
 
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-
-                    # Always call detect_pii first
-                    result = await session.call_tool(
-                        "detect_pii", {"text": text}
-                    )
+        key = hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+        reply = _INTERPRETATION_CACHE.get(key)
+        if reply is not None:
+            _INTERPRETATION_CACHE.move_to_end(key)
+            print(f"🤖 Gemini: {reply}")
+            return reply
+
+        reply = await self.ask_gemini(
+            prompt, echo=True, generation_config=config
+        )
+        if not reply.startswith("❌ Gemini error:"):
+            _INTERPRETATION_CACHE[key] = reply
+            if len(_INTERPRETATION_CACHE) > _INTERPRETATION_CACHE_SIZE:
+                _INTERPRETATION_CACHE.popitem(last=False)
+        return reply
+
+    async def _call_tool(self, name, arguments):
+        """Call an MCP tool over the open session and decode its JSON result."""
+        try:
+            session = await self._ensure_connected()
+            result = await session.call_tool(name, arguments)
 
-                    if result.content:
-                        return json.loads(result.content[0].text)
-                    return None
+            if result.content:
+                return loads(result.content[0].text)
+            return None
 
         except Exception as e:
             print(f"❌ Error calling MCP tool: {e}")
             return None
 
+    async def detect_pii(self, text):
+        """Always call detect_pii tool first."""
+        return await self._call_tool("detect_pii", {"text": text})
+
+    async def detect_pii_batch(self, texts):
+        """
+        Detect PII in many texts (e.g. the lines of a file) in one request.
+
+        The server parses all of them in a single spaCy pass, which is far
+        faster than one detect_pii call per text.
+        """
+        return await self._call_tool("detect_pii_batch", {"texts": texts})
+
     async def sanitize_text(self, text, redaction_type="generic"):
         """Sanitize text using MCP tools."""
-        try:
-            # Calculate correct path to MCP server
-            mcp_server_path = (
-                Path(__file__).parent.parent.parent
-                / "core"
-                / "server"
-                / "vuln_mcp_stdio.py"
-            )
-            server_params = StdioServerParameters(
-                command="python",
-                args=[str(mcp_server_path)],
-                env={"PYTHONPATH": str(Path(__file__).parent.parent.parent)},
-            )
+        return await self._call_tool(
+            "sanitize_text", {"text": text, "redaction_type": redaction_type}
+        )
 
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
+    def detect_pii_sync(self, text):
+        """Blocking detect_pii for callers outside the MCP loop."""
+        return _MCPLoopRunner.run(self.detect_pii(text))
 
-                    # Call sanitize_text tool
-                    result = await session.call_tool(
-                        "sanitize_text",
-                        {"text": text, "redaction_type": redaction_type},
-                    )
+    def sanitize_text_sync(self, text, redaction_type="generic"):
+        """Blocking sanitize_text for callers outside the MCP loop."""
+        return _MCPLoopRunner.run(self.sanitize_text(text, redaction_type))
 
-                    if result.content:
-                        return json.loads(result.content[0].text)
-                    return None
+    def close_sync(self):
+        """Blocking aclose() for the session the *_sync methods opened."""
+        _MCPLoopRunner.run(self.aclose())
 
-        except Exception as e:
-            print(f"❌ Error calling MCP tool: {e}")
-            return None
+    async def detect_and_sanitize(self, text, redaction_type="generic"):
+        """Run detect_pii and sanitize_text together over the open session."""
+        return await asyncio.gather(
+            self.detect_pii(text), self.sanitize_text(text, redaction_type)
+        )
 
     async def process_request(self, user_input):
         """Process a user request with auto-detection."""
-        print(f"\n👤 User: {user_input}")
-
-        # Always detect PII first
-        print("🔍 Auto-detecting PII...")
-        pii_result = await self.detect_pii(user_input)
-
-        if pii_result:
-            print(f"📊 PII Detection Results:")
-            print(f"   Total detections: {pii_result['total_detections']}")
-            print(f"   Categories: {pii_result['categories']}")
-            if pii_result["total_detections"] > 0:
-                print(f"   Details: {pii_result['detailed_findings']}")
-
-            # Ask Gemini to interpret the results
-            interpretation_prompt = f"""
+        # Each part of the report goes out in a single write
+        header = f"\n👤 User: {user_input}\n"
+        if VERBOSE:
+            header += "🔍 Auto-detecting PII...\n"
+        sys.stdout.write(header)
+
+        # Always detect PII first; the sanitized copy is fetched alongside
+        pii_result, sanitized = await self.detect_and_sanitize(user_input)
+
+        if not pii_result:
+            sys.stdout.write("❌ Failed to detect PII\n\n")
+            sys.stdout.flush()
+            return
+
+        total = pii_result["total_detections"]
+        out = [
+            "📊 PII Detection Results:\n",
+            f"   Total detections: {total}\n",
+        ]
+        if VERBOSE:
+            out.append(f"   Categories: {pii_result['categories']}\n")
+        if total == 0:
+            # Nothing for Gemini to explain; skip the round trip
+            out.append(
+                "🤖 Gemini: No sensitive information detected in the provided text.\n\n"
+            )
+            sys.stdout.write("".join(out))
+            sys.stdout.flush()
+            return
+
+        if VERBOSE:
+            out.append(f"   Details: {pii_result['detailed_findings']}\n")
+        if sanitized:
+            out.append(f"🧹 Sanitized: {sanitized['sanitized_text']}\n")
+        sys.stdout.write("".join(out))
+
+        # Ask Gemini to interpret the results
+        interpretation_prompt = f"""
 The user provided this text: {user_input}
 
 I ran it through a PII detection tool and found:
-- Total detections: {pii_result['total_detections']}
+- Total detections: {total}
 - Categories: {pii_result['categories']}
 - Details: {pii_result['detailed_findings']}
 
 Please provide a helpful response explaining what PII was found and what the user should know about it.
 """
-            interpretation = self.ask_gemini(interpretation_prompt)
-            print(f"🤖 Gemini: {interpretation}")
-        else:
-            print("❌ Failed to detect PII")
-
-        print()
+        await self.interpret(interpretation_prompt)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
 
 
 async def interactive_mode():
@@ -190,32 +399,34 @@ async def interactive_mode():
     print()
 
     try:
-        # Initialize Gemini
-        gemini = AutoDetectGeminiMCP()
-        print("✅ Auto-detect system initialized successfully!")
-        print()
-
-        while True:
-            try:
-                user_input = input(
-                    "👤 Enter text to analyze (or 'quit'): "
-                ).strip()
-
-                if user_input.lower() in ["quit", "exit", "q"]:
-                    print("👋 Goodbye!")
+        # Initialize Gemini and start the MCP server once for the session
+        async with AutoDetectGeminiMCP() as gemini:
+            print("✅ Auto-detect system initialized successfully!")
+            print()
+
+            while True:
+                try:
+                    user_input = (
+                        await ainput(
+                            "👤 Enter text to analyze (or 'quit'): "
+                        )
+                    ).strip()
+
+                    if user_input.lower() in ["quit", "exit", "q"]:
+                        print("👋 Goodbye!")
+                        break
+
+                    if not user_input:
+                        continue
+
+                    # Process the request
+                    await gemini.process_request(user_input)
+
+                except KeyboardInterrupt:
+                    print("\n👋 Goodbye!")
                     break
-
-                if not user_input:
-                    continue
-
-                # Process the request
-                await gemini.process_request(user_input)
-
-            except KeyboardInterrupt:
-                print("\n👋 Goodbye!")
-                break
-            except Exception as e:
-                print(f"❌ Error: {e}")
+                except Exception as e:
+                    print(f"❌ Error: {e}")
 
     except Exception as e:
         print(f"❌ Failed to initialize: {e}")
@@ -225,4 +436,8 @@ async def interactive_mode():
 
 
 if __name__ == "__main__":
-    asyncio.run(interactive_mode())
+    try:
+        run(interactive_mode())
+    except KeyboardInterrupt:
+        # Ctrl+C at the prompt cancels the loop rather than raising there
+        print("\n👋 Goodbye!")
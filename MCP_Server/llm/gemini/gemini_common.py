@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Shared setup for the Gemini clients.
+
+Loads the .env file and configures the Gemini SDK once per process, so
+programs that create several clients only pay for it the first time.
+Also picks the event loop the clients run on, and holds the helpers
+they share for parsing replies and reading input.
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import re
+import sys
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+# Prefer a libuv-based event loop when available
+if sys.platform == "win32":
+    try:
+        import winloop as uvloop
+    except ImportError:
+        uvloop = None
+else:
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+GEMINI_MODEL = "gemini-1.5-flash"
+
+# The TOOL_CALL line and the ARGUMENTS line after it, found in one search
+TOOL_CALL_RE = re.compile(
+    r"^TOOL_CALL:\s*(\S+).*?^ARGUMENTS:([^\n]*)", re.MULTILINE | re.DOTALL
+)
+
+# MCP_Server directory and the stdio server the clients launch
+MCP_SERVER_DIR = Path(__file__).parent.parent.parent
+STDIO_SERVER_SCRIPT = MCP_SERVER_DIR / "core" / "server" / "vuln_mcp_stdio.py"
+
+# pip package for each module whose name differs from it
+_PACKAGE_NAMES = {
+    "google.generativeai": "google-generativeai",
+    "dotenv": "python-dotenv",
+}
+
+
+def require(*modules):
+    """Raise ImportError naming every missing module, without importing."""
+    missing = []
+    for module in modules:
+        try:
+            found = importlib.util.find_spec(module) is not None
+        except ModuleNotFoundError:
+            # Raised when a parent package (e.g. "google") is missing
+            found = False
+        if not found:
+            missing.append(_PACKAGE_NAMES.get(module, module))
+    if missing:
+        raise ImportError(
+            f"Missing dependencies: {', '.join(missing)}\n"
+            f"Install them with: pip install {' '.join(missing)}"
+        )
+
+
+def new_event_loop():
+    """Create a uvloop/winloop event loop if installed, else asyncio's."""
+    if uvloop is not None:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def run(main):
+    """Like asyncio.run(), but on a loop from new_event_loop()."""
+    if hasattr(asyncio, "Runner"):
+        with asyncio.Runner(loop_factory=new_event_loop) as runner:
+            return runner.run(main)
+
+    # Python < 3.11
+    loop = new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            _cancel_all_tasks(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+def _cancel_all_tasks(loop):
+    """Cancel the tasks main() left behind, as asyncio.run() does."""
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+
+def loads(data):
+    """Parse a JSON document from bytes or str, with orjson if installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+async def ainput(prompt):
+    """
+    input() that keeps the event loop running while the user types.
+
+    Reads on a daemon thread rather than asyncio.to_thread, whose worker
+    would keep the process alive after Ctrl+C until Enter is pressed.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(line, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(line)
+
+    def read():
+        try:
+            line, error = input(prompt), None
+        except Exception as e:
+            line, error = None, e
+        try:
+            loop.call_soon_threadsafe(settle, line, error)
+        except RuntimeError:
+            pass  # loop already closed
+
+    threading.Thread(target=read, name="input", daemon=True).start()
+    return await future
+
+
+@lru_cache(maxsize=1)
+def load_env_once():
+    """Load environment variables from the .env file, once per process."""
+    try:
+        from dotenv import load_dotenv
+
+        # Load .env from the master directory (parent of MCP_Server)
+        master_dir = Path(__file__).parent.parent.parent.parent
+        env_path = master_dir / ".env"
+        if env_path.exists():
+            load_dotenv(env_path)
+            print(f"✅ Loaded environment variables from {env_path}")
+        else:
+            print(f"⚠️  No .env file found at {env_path}")
+    except ImportError:
+        print(
+            "⚠️  python-dotenv not installed, using system environment variables only"
+        )
+
+
+def get_api_key():
+    """Return GCP_KEY from .env, falling back to GEMINI_API_KEY."""
+    load_env_once()
+    return os.getenv("GCP_KEY") or os.getenv("GEMINI_API_KEY")
+
+
+@lru_cache(maxsize=None)
+def get_gemini_model(api_key, system_instruction=None):
+    """Configure Gemini once per API key and reuse the model handle.
+
+    A model built with a system_instruction keeps those instructions
+    out of each prompt, so callers only send the per-request text.
+    """
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(
+        GEMINI_MODEL, system_instruction=system_instruction
+    )
+
+
+@lru_cache(maxsize=1)
+def stdio_server_params():
+    """Launch parameters for the stdio MCP server, built once."""
+    from mcp import StdioServerParameters
+
+    return StdioServerParameters(
+        command="python",
+        args=[str(STDIO_SERVER_SCRIPT)],
+        env={"PYTHONPATH": str(MCP_SERVER_DIR)},
+    )
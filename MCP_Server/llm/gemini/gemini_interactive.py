@@ -7,103 +7,58 @@ strings or file paths to the Gemini + MCP sanitizer system.
 """
 
 import asyncio
-import json
 import os
+import re
 import sys
-from pathlib import Path
-
-# Add MCP to path
-sys.path.insert(0, str(Path(__file__).parent))
-
-try:
-    import google.generativeai as genai
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
-except ImportError as e:
-    print(f"Missing dependencies: {e}")
-    print("Installing required packages...")
-    import subprocess
-
-    subprocess.check_call(
-        [
-            sys.executable,
-            "-m",
-            "pip",
-            "install",
-            "google-generativeai",
-            "mcp",
-            "python-dotenv",
-        ]
-    )
-    import google.generativeai as genai
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
+from contextlib import AsyncExitStack
+
+from gemini_common import (
+    TOOL_CALL_RE,
+    ainput,
+    get_api_key,
+    get_gemini_model,
+    load_env_once,
+    loads,
+    require,
+    run,
+    stdio_server_params,
+)
+
+# Fail fast, naming every missing package, instead of installing at import
+require("google.generativeai", "mcp")
+
+from mcp import ClientSession  # noqa: E402
+from mcp.client.stdio import stdio_client  # noqa: E402
 
 # Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-
-    # Load .env from the master directory (parent of MCP_Server)
-    master_dir = Path(__file__).parent.parent.parent.parent
-    env_path = master_dir / ".env"
-    if env_path.exists():
-        load_dotenv(env_path)
-        print(f"✅ Loaded environment variables from {env_path}")
-    else:
-        print(f"⚠️  No .env file found at {env_path}")
-except ImportError:
-    print(
-        "⚠️  python-dotenv not installed, using system environment variables only"
-    )
-
-
-class InteractiveGeminiMCP:
-    """Interactive Gemini LLM with MCP integration."""
-
-    def __init__(self):
-        """Initialize Gemini."""
-        # Get API key
-        api_key = os.getenv("GCP_KEY") or os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("Please set GCP_KEY or GEMINI_API_KEY")
-
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
-
-    def ask_gemini(self, prompt):
-        """Ask Gemini a question."""
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"❌ Gemini error: {e}"
-
-    def extract_tool_call(self, response):
-        """Extract tool call from Gemini response."""
-        if "TOOL_CALL:" in response:
-            lines = response.split("\n")
-            tool_name = None
-            arguments = {}
-
-            for line in lines:
-                if line.startswith("TOOL_CALL:"):
-                    tool_name = line.split(":", 1)[1].strip()
-                elif line.startswith("ARGUMENTS:"):
-                    try:
-                        args_str = line.split(":", 1)[1].strip()
-                        arguments = json.loads(args_str)
-                    except:
-                        pass
-
-            return tool_name, arguments
-        return None, {}
-
-    async def process_request(self, user_input):
-        """Process a user request with Gemini + MCP."""
-        print(f"\n👤 User: {user_input}")
-
-        # Ask Gemini what to do
-        system_prompt = """You are a helpful AI assistant with access to PII sanitization tools.
+load_env_once()
+
+
+# Requests that spell out the action, e.g. "Mask the PII in <text>" or
+# "Sanitize file <path>", mirroring the mapping in the system prompt
+_ROUTE_RE = re.compile(
+    r"^\s*(?P<verb>detect|check|sanitize|redact|mask|remove)"
+    r"(?P<pii>\s+(?:the\s+)?(?:for\s+)?pii\b)?"
+    r"(?:\s+(?:(?:in|from|of)\s+)?(?:the\s+)?file\s+(?P<file>\S.*?)"
+    r"|\s+(?:(?:in|from|of|on)\s+)?(?P<text>\S.*?))"
+    r"\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# verb -> (tool, redaction_type); None means detect_pii
+_ROUTES = {
+    "detect": None,
+    "check": None,
+    "sanitize": "generic",
+    "redact": "generic",
+    "mask": "mask",
+    "remove": "remove",
+}
+
+
+# System prompt for Gemini with MCP tools, built once and sent as an
+# identical prefix on every request
+_SYSTEM_PROMPT = """You are a helpful AI assistant with access to PII sanitization tools.
 
 Available tools:
 - detect_pii(text): Detect PII in text
@@ -131,60 +86,172 @@ Format your response as:
 TOOL_CALL: tool_name
 ARGUMENTS: {"arg1": "value1", "arg2": "value2"}"""
 
-        prompt = f"{system_prompt}\n\nUser request: {user_input}\n\nWhat tool should I call and with what arguments?"
+_PROMPT_SUFFIX = "\n\nWhat tool should I call and with what arguments?"
 
-        gemini_response = self.ask_gemini(prompt)
-        print(f"🤖 Gemini: {gemini_response}")
 
-        # Extract tool call
-        tool_name, arguments = self.extract_tool_call(gemini_response)
+def _route(user_input):
+    """
+    Map an explicit request straight to a tool call, without Gemini.
 
-        if tool_name and arguments:
-            print(
-                f"🔧 Gemini wants to call: {tool_name} with args: {arguments}"
+    Returns (tool_name, arguments), or (None, {}) when the request is not
+    one of the simple forms and Gemini should decide.
+    """
+    match = _ROUTE_RE.match(user_input)
+    if match is None:
+        return None, {}
+    verb = match.group("verb").lower()
+    redaction_type = _ROUTES[verb]
+
+    if match.group("file"):
+        if redaction_type is None:
+            return None, {}
+        return "sanitize_file", {
+            "file_path": match.group("file"),
+            "redaction_type": redaction_type,
+        }
+
+    # "check this" or "remove that" alone are too vague to route
+    if verb in ("detect", "check", "remove") and not match.group("pii"):
+        return None, {}
+    text = match.group("text")
+    if redaction_type is None:
+        return "detect_pii", {"text": text}
+    return "sanitize_text", {"text": text, "redaction_type": redaction_type}
+
+
+class InteractiveGeminiMCP:
+    """Interactive Gemini LLM with MCP integration."""
+
+    def __init__(self):
+        """Initialize Gemini."""
+        # Get API key
+        api_key = get_api_key()
+        if not api_key:
+            raise ValueError("Please set GCP_KEY or GEMINI_API_KEY")
+
+        self.model = get_gemini_model(api_key)
+
+        self._server_params = stdio_server_params()
+
+        # MCP session, opened by __aenter__
+        self._exit_stack = None
+        self._session = None
+
+    async def __aenter__(self):
+        """Start the MCP server and open a session reused by every request."""
+        self._exit_stack = AsyncExitStack()
+        try:
+            read, write = await self._exit_stack.enter_async_context(
+                stdio_client(self._server_params)
+            )
+            self._session = await self._exit_stack.enter_async_context(
+                ClientSession(read, write)
             )
+            await self._session.initialize()
+        except BaseException:
+            await self._exit_stack.aclose()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Close the MCP session and stop the server."""
+        await self._exit_stack.aclose()
+        self._session = None
+
+    async def ask_gemini(self, prompt, echo=False):
+        """
+        Ask Gemini a question without blocking the event loop.
+
+        With echo=True the reply is printed as "🤖 Gemini: ..." while it
+        streams in, instead of after the whole completion arrives.
+        """
+        parts = []
+
+        def emit(text):
+            parts.append(text)
+            if echo:
+                print(text, end="", flush=True)
+
+        if echo:
+            print("🤖 Gemini: ", end="", flush=True)
+        try:
+            generate = getattr(self.model, "generate_content_async", None)
+            if generate is not None:
+                response = await generate(prompt, stream=True)
+                async for chunk in response:
+                    emit(chunk.text)
+            else:
+                response = await asyncio.to_thread(
+                    self.model.generate_content, prompt
+                )
+                emit(response.text)
+        except Exception as e:
+            parts.clear()
+            emit(f"❌ Gemini error: {e}")
+        if echo:
+            print()
+        return "".join(parts)
 
-            # Call the MCP tool
-            try:
-                # Calculate correct path to MCP server
-                mcp_server_path = (
-                    Path(__file__).parent.parent.parent
-                    / "core"
-                    / "server"
-                    / "vuln_mcp_stdio.py"
+    def extract_tool_call(self, response):
+        """Extract tool call from Gemini response."""
+        match = TOOL_CALL_RE.search(response)
+        if match is None:
+            return None, {}
+        try:
+            arguments = loads(match.group(2))
+        except ValueError:
+            arguments = {}
+        return match.group(1), arguments
+
+    async def process_request(self, user_input):
+        """Process a user request with Gemini + MCP."""
+        print(f"\n👤 User: {user_input}")
+
+        # Explicit requests map straight to a tool; Gemini only decides
+        # the rest
+        tool_name, arguments = _route(user_input)
+        if tool_name:
+            print(f"🔧 Calling: {tool_name} with args: {arguments}")
+        else:
+            # The system prompt is a fixed prefix
+            prompt = "".join(
+                (
+                    _SYSTEM_PROMPT,
+                    "\n\nUser request: ",
+                    user_input,
+                    _PROMPT_SUFFIX,
                 )
-                server_params = StdioServerParameters(
-                    command="python",
-                    args=[str(mcp_server_path)],
-                    env={
-                        "PYTHONPATH": str(Path(__file__).parent.parent.parent)
-                    },
+            )
+
+            gemini_response = await self.ask_gemini(prompt, echo=True)
+
+            # Extract tool call
+            tool_name, arguments = self.extract_tool_call(gemini_response)
+            if tool_name and arguments:
+                print(
+                    f"🔧 Gemini wants to call: {tool_name} with args: {arguments}"
                 )
 
-                async with stdio_client(server_params) as (read, write):
-                    async with ClientSession(read, write) as session:
-                        await session.initialize()
+        if tool_name and arguments:
 
-                        # Call the tool
-                        result = await session.call_tool(tool_name, arguments)
+            # Call the MCP tool over the open session
+            try:
+                result = await self._session.call_tool(tool_name, arguments)
 
-                        if result.content:
-                            tool_result = result.content[0].text
-                            print(f"📄 MCP Tool Result: {tool_result}")
+                if result.content:
+                    tool_result = result.content[0].text
+                    print(f"📄 MCP Tool Result: {tool_result}")
 
-                            # Ask Gemini to interpret the result
-                            interpretation_prompt = f"""
+                    # Ask Gemini to interpret the result
+                    interpretation_prompt = f"""
 The user asked: {user_input}
 I called tool {tool_name} and got this result: {tool_result}
 
 Please provide a helpful response to the user explaining what was found/done.
 """
-                            interpretation = self.ask_gemini(
-                                interpretation_prompt
-                            )
-                            print(f"🤖 Gemini: {interpretation}")
-                        else:
-                            print("❌ No result from MCP tool")
+                    await self.ask_gemini(interpretation_prompt, echo=True)
+                else:
+                    print("❌ No result from MCP tool")
                 print()
 
             except Exception as e:
@@ -215,42 +282,44 @@ async def interactive_mode():
     print()
 
     try:
-        # Initialize Gemini
-        gemini = InteractiveGeminiMCP()
-        print("✅ Gemini initialized successfully!")
-        print()
+        # Initialize Gemini and start the MCP server once for the session
+        async with InteractiveGeminiMCP() as gemini:
+            print("✅ Gemini initialized successfully!")
+            print()
 
-        while True:
-            try:
-                user_input = input(
-                    "👤 Enter text or file path (or 'quit'): "
-                ).strip()
+            while True:
+                try:
+                    user_input = (
+                        await ainput(
+                            "👤 Enter text or file path (or 'quit'): "
+                        )
+                    ).strip()
 
-                if user_input.lower() in ["quit", "exit", "q"]:
-                    print("👋 Goodbye!")
-                    break
+                    if user_input.lower() in ["quit", "exit", "q"]:
+                        print("👋 Goodbye!")
+                        break
 
-                if not user_input:
-                    continue
+                    if not user_input:
+                        continue
 
-                # Check if it's a file path
-                if user_input.startswith("file:"):
-                    file_path = user_input[5:].strip()
-                    if os.path.exists(file_path):
-                        await gemini.process_request(
-                            f"Sanitize file {file_path}"
-                        )
+                    # Check if it's a file path
+                    if user_input.startswith("file:"):
+                        file_path = user_input[5:].strip()
+                        if os.path.exists(file_path):
+                            await gemini.process_request(
+                                f"Sanitize file {file_path}"
+                            )
+                        else:
+                            print(f"❌ File not found: {file_path}")
                     else:
-                        print(f"❌ File not found: {file_path}")
-                else:
-                    # Regular text input
-                    await gemini.process_request(user_input)
+                        # Regular text input
+                        await gemini.process_request(user_input)
 
-            except KeyboardInterrupt:
-                print("\n👋 Goodbye!")
-                break
-            except Exception as e:
-                print(f"❌ Error: {e}")
+                except KeyboardInterrupt:
+                    print("\n👋 Goodbye!")
+                    break
+                except Exception as e:
+                    print(f"❌ Error: {e}")
 
     except Exception as e:
         print(f"❌ Failed to initialize: {e}")
@@ -274,19 +343,18 @@ async def single_request_mode():
     user_input = sys.argv[1]
 
     try:
-        # Initialize Gemini
-        gemini = InteractiveGeminiMCP()
-
-        # Check if it's a file path
-        if user_input.startswith("file:"):
-            file_path = user_input[5:].strip()
-            if os.path.exists(file_path):
-                await gemini.process_request(f"Sanitize file {file_path}")
+        # Initialize Gemini and start the MCP server
+        async with InteractiveGeminiMCP() as gemini:
+            # Check if it's a file path
+            if user_input.startswith("file:"):
+                file_path = user_input[5:].strip()
+                if os.path.exists(file_path):
+                    await gemini.process_request(f"Sanitize file {file_path}")
+                else:
+                    print(f"❌ File not found: {file_path}")
             else:
-                print(f"❌ File not found: {file_path}")
-        else:
-            # Regular text input
-            await gemini.process_request(user_input)
+                # Regular text input
+                await gemini.process_request(user_input)
 
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -308,7 +376,11 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    if args.interactive or not args.input:
-        asyncio.run(interactive_mode())
-    else:
-        asyncio.run(single_request_mode())
+    try:
+        if args.interactive or not args.input:
+            run(interactive_mode())
+        else:
+            run(single_request_mode())
+    except KeyboardInterrupt:
+        # Ctrl+C at the prompt cancels the loop rather than raising there
+        print("\n👋 Goodbye!")
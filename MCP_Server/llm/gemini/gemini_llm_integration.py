@@ -6,54 +6,74 @@ This integrates Google's Gemini LLM with our MCP sanitizer tools.
 """
 
 import asyncio
-import json
-import os
-import sys
-from pathlib import Path
-
-# Add MCP to path
-sys.path.insert(0, str(Path(__file__).parent))
-
-try:
-    import google.generativeai as genai
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
-except ImportError as e:
-    print(f"Missing dependencies: {e}")
-    print("Installing required packages...")
-    import subprocess
-
-    subprocess.check_call(
-        [
-            sys.executable,
-            "-m",
-            "pip",
-            "install",
-            "google-generativeai",
-            "mcp",
-            "python-dotenv",
-        ]
-    )
-    import google.generativeai as genai
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
+from contextlib import AsyncExitStack
+
+from gemini_common import (
+    TOOL_CALL_RE,
+    ainput,
+    get_api_key,
+    get_gemini_model,
+    load_env_once,
+    loads,
+    require,
+    run,
+    stdio_server_params,
+)
+
+# Fail fast, naming every missing package, instead of installing at import
+require("google.generativeai", "mcp")
+
+from mcp import ClientSession  # noqa: E402
+from mcp.client.stdio import stdio_client  # noqa: E402
 
 # Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-
-    # Load .env from the master directory (parent of MCP_Server)
-    master_dir = Path(__file__).parent.parent.parent.parent
-    env_path = master_dir / ".env"
-    if env_path.exists():
-        load_dotenv(env_path)
-        print(f"✅ Loaded environment variables from {env_path}")
-    else:
-        print(f"⚠️  No .env file found at {env_path}")
-except ImportError:
-    print(
-        "⚠️  python-dotenv not installed, using system environment variables only"
-    )
+load_env_once()
+
+
+# System prompt for Gemini with MCP tools, built once and sent as an
+# identical prefix on every request
+_SYSTEM_PROMPT = """You are a helpful AI assistant with access to PII sanitization tools.
+
+Available tools:
+- detect_pii(text): Detect PII in text
+- sanitize_text(text, redaction_type): Sanitize text (redaction_type: generic, mask, remove)
+- get_sanitization_report(text): Get detailed PII report
+- sanitize_file(file_path, redaction_type): Sanitize file content
+
+When users ask you to:
+- "detect PII" or "check for PII" → use detect_pii tool
+- "sanitize" or "redact" → use sanitize_text with generic redaction
+- "mask" → use sanitize_text with mask redaction  
+- "remove PII" → use sanitize_text with remove redaction
+- "sanitize file" → use sanitize_file tool
+
+Always call the appropriate tool and explain what you found/did.
+
+Format your tool calls as:
+TOOL_CALL: tool_name
+ARGUMENTS: {"arg1": "value1", "arg2": "value2"}
+
+Then I'll execute the tool and give you the result."""
+
+_PROMPT_SUFFIX = "\n\nWhat tool should I call and with what arguments?"
+
+_BATCH_INTERPRETATION_PROMPT = """For each numbered user request below I called an MCP tool.
+For each one, write a helpful response to the user explaining what was found/done.
+
+Return only a JSON array of strings, one response per request, in order."""
+
+
+def extract_tool_call(response):
+    """Extract (tool_name, arguments) from a Gemini tool-call reply."""
+    match = TOOL_CALL_RE.search(response)
+    if match is None:
+        return None, {}
+    try:
+        arguments = loads(match.group(2))
+    except ValueError:
+        print("❌ Could not parse arguments")
+        arguments = {}
+    return match.group(1), arguments
 
 
 class GeminiLLMWithMCP:
@@ -61,53 +81,55 @@ class GeminiLLMWithMCP:
 
     def __init__(self, api_key=None):
         """Initialize Gemini with API key."""
-        if api_key:
-            genai.configure(api_key=api_key)
-        else:
+        if not api_key:
             # Try to get from environment variables
             # First try GCP_KEY from .env file, then fallback to GEMINI_API_KEY
-            api_key = os.getenv("GCP_KEY") or os.getenv("GEMINI_API_KEY")
+            api_key = get_api_key()
             if not api_key:
                 raise ValueError(
                     "Please provide GCP_KEY or GEMINI_API_KEY environment variable, or pass api_key parameter"
                 )
-            genai.configure(api_key=api_key)
 
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
+        self.model = get_gemini_model(api_key)
         self.mcp_session = None
         self.available_tools = {}
+        self._exit_stack = AsyncExitStack()
 
     async def connect_to_mcp(self):
         """Connect to the MCP sanitizer server."""
         try:
-            server_params = StdioServerParameters(
-                command="python",
-                args=["vuln_mcp_stdio.py"],
-                env={"PYTHONPATH": str(Path(__file__).parent)},
-            )
+            server_params = stdio_server_params()
 
             print("🔌 Connecting to MCP server...")
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    self.mcp_session = session
-                    await session.initialize()
-
-                    # Get available tools
-                    tools_result = await session.list_tools()
-                    self.available_tools = {
-                        tool.name: tool for tool in tools_result.tools
-                    }
-
-                    print("✅ Connected to MCP server")
-                    print(
-                        f"✅ Available tools: {list(self.available_tools.keys())}"
-                    )
-                    return True
+            # The exit stack keeps the server and session open until aclose()
+            read, write = await self._exit_stack.enter_async_context(
+                stdio_client(server_params)
+            )
+            self.mcp_session = await self._exit_stack.enter_async_context(
+                ClientSession(read, write)
+            )
+            await self.mcp_session.initialize()
+
+            # Get available tools
+            tools_result = await self.mcp_session.list_tools()
+            self.available_tools = {
+                tool.name: tool for tool in tools_result.tools
+            }
+
+            print("✅ Connected to MCP server")
+            print(f"✅ Available tools: {list(self.available_tools.keys())}")
+            return True
 
         except Exception as e:
             print(f"❌ Failed to connect to MCP: {e}")
+            await self.aclose()
             return False
 
+    async def aclose(self):
+        """Close the MCP session and stop the server."""
+        await self._exit_stack.aclose()
+        self.mcp_session = None
+
     async def call_mcp_tool(self, tool_name, arguments):
         """Call an MCP tool."""
         if not self.mcp_session or tool_name not in self.available_tools:
@@ -125,60 +147,76 @@ class GeminiLLMWithMCP:
             traceback.print_exc()
             return None
 
-    def create_system_prompt(self):
-        """Create system prompt for Gemini with MCP tools."""
-        return """You are a helpful AI assistant with access to PII sanitization tools.
-
-Available tools:
-- detect_pii(text): Detect PII in text
-- sanitize_text(text, redaction_type): Sanitize text (redaction_type: generic, mask, remove)
-- get_sanitization_report(text): Get detailed PII report
-- sanitize_file(file_path, redaction_type): Sanitize file content
-
-When users ask you to:
-- "detect PII" or "check for PII" → use detect_pii tool
-- "sanitize" or "redact" → use sanitize_text with generic redaction
-- "mask" → use sanitize_text with mask redaction  
-- "remove PII" → use sanitize_text with remove redaction
-- "sanitize file" → use sanitize_file tool
+    async def choose_tool(self, user_input):
+        """Ask Gemini which MCP tool to call for a request."""
+        # The system prompt is a fixed prefix
+        prompt = "".join(
+            (_SYSTEM_PROMPT, "\n\nUser request: ", user_input, _PROMPT_SUFFIX)
+        )
+        # Async variant so concurrent requests overlap their round trips
+        response = await self.model.generate_content_async(prompt)
+        return response.text
 
-Always call the appropriate tool and explain what you found/did.
+    async def interpret(self, user_input, tool_name, result):
+        """Ask Gemini to explain one tool result to the user."""
+        interpretation_prompt = f"""
+The user asked: {user_input}
+I called tool {tool_name} and got this result: {result}
 
-Format your tool calls as:
-TOOL_CALL: tool_name
-ARGUMENTS: {"arg1": "value1", "arg2": "value2"}
+Please provide a helpful response to the user explaining what was found/done.
+"""
+        response = await self.model.generate_content_async(
+            interpretation_prompt
+        )
+        return response.text
+
+    async def interpret_batch(self, exchanges):
+        """
+        Interpret several (user_input, tool_name, result) exchanges at once.
+
+        Makes one Gemini call that answers with a JSON array of replies.
+        If that answer cannot be used, falls back to interpret() per
+        exchange, run concurrently.
+        """
+        parts = [_BATCH_INTERPRETATION_PROMPT]
+        for i, (user_input, tool_name, result) in enumerate(exchanges, 1):
+            parts.append(
+                f"\n\n{i}. The user asked: {user_input}\n"
+                f"I called tool {tool_name} and got this result: {result}"
+            )
 
-Then I'll execute the tool and give you the result."""
+        try:
+            response = await self.model.generate_content_async(
+                "".join(parts),
+                generation_config={"response_mime_type": "application/json"},
+            )
+            replies = loads(response.text)
+            if (
+                isinstance(replies, list)
+                and len(replies) == len(exchanges)
+                and all(isinstance(reply, str) for reply in replies)
+            ):
+                return replies
+            print("⚠️  Unexpected batch reply, interpreting one by one")
+        except ValueError:
+            print("⚠️  Batch reply was not JSON, interpreting one by one")
+
+        return await asyncio.gather(
+            *(self.interpret(*exchange) for exchange in exchanges)
+        )
 
     async def process_user_request(self, user_input):
         """Process user request using Gemini + MCP tools."""
         print(f"\n👤 User: {user_input}")
 
-        # Create conversation with system prompt
-        system_prompt = self.create_system_prompt()
-
-        # Ask Gemini what to do
-        prompt = f"{system_prompt}\n\nUser request: {user_input}\n\nWhat tool should I call and with what arguments?"
-
         try:
-            response = self.model.generate_content(prompt)
-            print(f"🤖 Gemini: {response.text}")
+            # Ask Gemini what to do
+            response = await self.choose_tool(user_input)
+            print(f"🤖 Gemini: {response}")
 
             # Parse Gemini's response for tool calls
-            if "TOOL_CALL:" in response.text:
-                lines = response.text.split("\n")
-                tool_name = None
-                arguments = {}
-
-                for line in lines:
-                    if line.startswith("TOOL_CALL:"):
-                        tool_name = line.split(":", 1)[1].strip()
-                    elif line.startswith("ARGUMENTS:"):
-                        try:
-                            args_str = line.split(":", 1)[1].strip()
-                            arguments = json.loads(args_str)
-                        except:
-                            print("❌ Could not parse arguments")
+            if "TOOL_CALL:" in response:
+                tool_name, arguments = extract_tool_call(response)
 
                 if tool_name and arguments:
                     print(
@@ -190,23 +228,17 @@ Then I'll execute the tool and give you the result."""
                         print(f"📄 Tool result: {result[:200]}...")
 
                         # Ask Gemini to interpret the result
-                        interpretation_prompt = f"""
-The user asked: {user_input}
-I called tool {tool_name} and got this result: {result}
-
-Please provide a helpful response to the user explaining what was found/done.
-"""
-                        interpretation = self.model.generate_content(
-                            interpretation_prompt
+                        interpretation = await self.interpret(
+                            user_input, tool_name, result
                         )
-                        print(f"🤖 Gemini: {interpretation.text}")
-                        return interpretation.text
+                        print(f"🤖 Gemini: {interpretation}")
+                        return interpretation
                     else:
                         return "❌ Tool call failed"
                 else:
                     return "❌ Could not determine tool to call"
             else:
-                return response.text
+                return response
 
         except Exception as e:
             print(f"❌ Error with Gemini: {e}")
@@ -226,7 +258,7 @@ async def gemini_demo():
     print()
 
     # Check for API key
-    api_key = os.getenv("GCP_KEY") or os.getenv("GEMINI_API_KEY")
+    api_key = get_api_key()
     if not api_key:
         print("❌ Please set GCP_KEY or GEMINI_API_KEY environment variable")
         print(
@@ -238,6 +270,7 @@ async def gemini_demo():
         print("   Or run: export GEMINI_API_KEY='your-api-key-here'")
         return
 
+    llm = None
     try:
         # Initialize Gemini LLM
         llm = GeminiLLMWithMCP()
@@ -257,9 +290,42 @@ async def gemini_demo():
         print("🎬 Running Gemini + MCP demo...")
         print()
 
-        for i, request in enumerate(demo_requests, 1):
+        async def run_tool(request):
+            """Let Gemini pick a tool for one request and call it."""
+            try:
+                response = await llm.choose_tool(request)
+            except Exception as e:
+                return None, f"❌ Error: {e}"
+            if "TOOL_CALL:" not in response:
+                return None, response
+            tool_name, arguments = extract_tool_call(response)
+            if not (tool_name and arguments):
+                return None, "❌ Could not determine tool to call"
+            print(f"🔧 {request!r} → {tool_name} with args: {arguments}")
+            result = await llm.call_mcp_tool(tool_name, arguments)
+            if not result:
+                return None, "❌ Tool call failed"
+            return (request, tool_name, result), None
+
+        # The requests are independent, so pick and run their tools
+        # concurrently over the one MCP session, then have Gemini
+        # interpret every result in a single call
+        outcomes = await asyncio.gather(*map(run_tool, demo_requests))
+        exchanges = [exchange for exchange, _ in outcomes if exchange]
+        replies = iter(
+            await llm.interpret_batch(exchanges) if exchanges else ()
+        )
+        responses = [
+            next(replies) if exchange else reply
+            for exchange, reply in outcomes
+        ]
+
+        for i, (request, response) in enumerate(
+            zip(demo_requests, responses), 1
+        ):
             print(f"--- Demo {i} ---")
-            response = await llm.process_user_request(request)
+            print(f"👤 User: {request}")
+            print(f"🤖 Gemini: {response}")
             print()
 
         print("✅ Gemini + MCP demo completed!")
@@ -269,6 +335,9 @@ async def gemini_demo():
         import traceback
 
         traceback.print_exc()
+    finally:
+        if llm is not None:
+            await llm.aclose()
 
 
 async def interactive_gemini():
@@ -284,7 +353,7 @@ async def interactive_gemini():
     print()
 
     # Check for API key
-    api_key = os.getenv("GCP_KEY") or os.getenv("GEMINI_API_KEY")
+    api_key = get_api_key()
     if not api_key:
         print("❌ Please set GCP_KEY or GEMINI_API_KEY environment variable")
         print(
@@ -292,6 +361,7 @@ async def interactive_gemini():
         )
         return
 
+    llm = None
     try:
         # Initialize Gemini LLM
         llm = GeminiLLMWithMCP()
@@ -305,7 +375,7 @@ async def interactive_gemini():
 
         while True:
             try:
-                user_input = input("👤 You: ").strip()
+                user_input = (await ainput("👤 You: ")).strip()
 
                 if user_input.lower() in ["quit", "exit", "q"]:
                     print("👋 Goodbye!")
@@ -328,6 +398,9 @@ async def interactive_gemini():
         import traceback
 
         traceback.print_exc()
+    finally:
+        if llm is not None:
+            await llm.aclose()
 
 
 if __name__ == "__main__":
@@ -344,9 +417,13 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     if args.demo:
-        asyncio.run(gemini_demo())
+        run(gemini_demo())
     elif args.interactive:
-        asyncio.run(interactive_gemini())
+        try:
+            run(interactive_gemini())
+        except KeyboardInterrupt:
+            # Ctrl+C at the prompt cancels the loop rather than raising there
+            print("\n👋 Goodbye!")
     else:
         print("Choose --demo or --interactive")
         print(
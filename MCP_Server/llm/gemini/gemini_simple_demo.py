@@ -6,129 +6,31 @@ This uses the same pattern as the working demo but with Gemini LLM.
 """
 
 import asyncio
-import json
-import os
-import sys
-from pathlib import Path
-
-# Add MCP to path
-sys.path.insert(0, str(Path(__file__).parent))
-
-try:
-    import google.generativeai as genai
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
-except ImportError as e:
-    print(f"Missing dependencies: {e}")
-    print("Installing required packages...")
-    import subprocess
-
-    subprocess.check_call(
-        [
-            sys.executable,
-            "-m",
-            "pip",
-            "install",
-            "google-generativeai",
-            "mcp",
-            "python-dotenv",
-        ]
-    )
-    import google.generativeai as genai
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
+import hashlib
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+
+from gemini_common import (
+    TOOL_CALL_RE,
+    get_api_key,
+    get_gemini_model,
+    load_env_once,
+    loads,
+    require,
+    stdio_server_params,
+)
+
+# Fail fast, naming every missing package, instead of installing at import
+require("google.generativeai", "mcp")
+
+from mcp import ClientSession  # noqa: E402
+from mcp.client.stdio import stdio_client  # noqa: E402
 
 # Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-
-    # Load .env from the master directory (parent of MCP_Server)
-    master_dir = Path(__file__).parent.parent.parent.parent
-    env_path = master_dir / ".env"
-    if env_path.exists():
-        load_dotenv(env_path)
-        print(f"✅ Loaded environment variables from {env_path}")
-    else:
-        print(f"⚠️  No .env file found at {env_path}")
-except ImportError:
-    print(
-        "⚠️  python-dotenv not installed, using system environment variables only"
-    )
-
-
-class SimpleGeminiMCP:
-    """Simple Gemini LLM with MCP integration."""
+load_env_once()
 
-    def __init__(self):
-        """Initialize Gemini."""
-        # Get API key
-        api_key = os.getenv("GCP_KEY") or os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("Please set GCP_KEY or GEMINI_API_KEY")
 
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
-
-    def ask_gemini(self, prompt):
-        """Ask Gemini a question."""
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"❌ Gemini error: {e}"
-
-    def extract_tool_call(self, response):
-        """Extract tool call from Gemini response."""
-        if "TOOL_CALL:" in response:
-            lines = response.split("\n")
-            tool_name = None
-            arguments = {}
-
-            for line in lines:
-                if line.startswith("TOOL_CALL:"):
-                    tool_name = line.split(":", 1)[1].strip()
-                elif line.startswith("ARGUMENTS:"):
-                    try:
-                        args_str = line.split(":", 1)[1].strip()
-                        arguments = json.loads(args_str)
-                    except:
-                        pass
-
-            return tool_name, arguments
-        return None, {}
-
-
-async def simple_gemini_demo():
-    """Simple demo using Gemini + MCP."""
-
-    print("=" * 80)
-    print("🤖 SIMPLE GEMINI + MCP DEMO")
-    print("=" * 80)
-    print()
-    print("This uses Gemini to decide which MCP tools to call.")
-    print()
-
-    try:
-        # Initialize Gemini
-        gemini = SimpleGeminiMCP()
-
-        # Demo requests
-        demo_requests = [
-            "Detect PII in john@example.com",
-            "Sanitize Contact john@example.com or call 555-123-4567",
-            "Mask the PII in john@example.com",
-            "Remove PII from My SSN is 123-45-6789",
-        ]
-
-        print("🎬 Running Simple Gemini + MCP demo...")
-        print()
-
-        for i, request in enumerate(demo_requests, 1):
-            print(f"--- Demo {i} ---")
-            print(f"👤 User: {request}")
-
-            # Ask Gemini what to do
-            system_prompt = """You are a helpful AI assistant with access to PII sanitization tools.
+_SYSTEM_PROMPT = """You are a helpful AI assistant with access to PII sanitization tools.
 
 Available tools:
 - detect_pii(text): Detect PII in text
@@ -156,80 +58,208 @@ Format your response as:
 TOOL_CALL: tool_name
 ARGUMENTS: {"arg1": "value1", "arg2": "value2"}"""
 
-            prompt = f"{system_prompt}\n\nUser request: {request}\n\nWhat tool should I call and with what arguments?"
+_PROMPT_SUFFIX = "\n\nWhat tool should I call and with what arguments?"
 
-            gemini_response = gemini.ask_gemini(prompt)
-            print(f"🤖 Gemini: {gemini_response}")
+# Gemini replies by prompt digest, so repeated requests skip the API
+_RESPONSE_CACHE = OrderedDict()
+_RESPONSE_CACHE_SIZE = 256
 
-            # Extract tool call
-            tool_name, arguments = gemini.extract_tool_call(gemini_response)
 
-            if tool_name and arguments:
-                print(
-                    f"🔧 Gemini wants to call: {tool_name} with args: {arguments}"
-                )
+def _has_tool_call(text):
+    """True once text holds a tool call whose arguments parse."""
+    match = TOOL_CALL_RE.search(text)
+    if match is None:
+        return False
+    try:
+        loads(match.group(2))
+    except ValueError:
+        return False
+    return True
+
+
+class SimpleGeminiMCP:
+    """Simple Gemini LLM with MCP integration."""
+
+    def __init__(self):
+        """Initialize Gemini."""
+        # Get API key
+        api_key = get_api_key()
+        if not api_key:
+            raise ValueError("Please set GCP_KEY or GEMINI_API_KEY")
+
+        # The static instructions ride along as the system instruction, a
+        # stable prefix shared by every call; prompts carry only the tail
+        self.model = get_gemini_model(api_key, _SYSTEM_PROMPT)
+
+        self._server_params = stdio_server_params()
+
+        # MCP session, opened once by connect() and shared by every request
+        self._exit_stack = None
+        self.session = None
+
+    async def connect(self):
+        """Start the MCP server and open the session."""
+        self._exit_stack = AsyncExitStack()
+        try:
+            read, write = await self._exit_stack.enter_async_context(
+                stdio_client(self._server_params)
+            )
+            self.session = await self._exit_stack.enter_async_context(
+                ClientSession(read, write)
+            )
+            await self.session.initialize()
+        except BaseException:
+            await self.aclose()
+            raise
+
+    async def aclose(self):
+        """Close the MCP session and stop the server."""
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+        self.session = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def ask_gemini(self, prompt, stop_at_tool_call=False):
+        """Ask Gemini a question, reusing the reply for a repeated prompt.
+
+        The reply is streamed; with stop_at_tool_call the stream is cut
+        off once a complete TOOL_CALL/ARGUMENTS pair has arrived.
+        """
+        key = hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+        reply = _RESPONSE_CACHE.get(key)
+        if reply is not None:
+            _RESPONSE_CACHE.move_to_end(key)
+            return reply
+
+        parts = []
+        try:
+            response = await self.model.generate_content_async(
+                prompt, stream=True
+            )
+            async for chunk in response:
+                parts.append(chunk.text)
+                if stop_at_tool_call and _has_tool_call("".join(parts)):
+                    break
+        except Exception as e:
+            return f"❌ Gemini error: {e}"
+        reply = "".join(parts)
+
+        _RESPONSE_CACHE[key] = reply
+        if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+        return reply
+
+    def extract_tool_call(self, response):
+        """Extract tool call from Gemini response."""
+        match = TOOL_CALL_RE.search(response)
+        if match is None:
+            return None, {}
+        try:
+            arguments = loads(match.group(2))
+        except ValueError:
+            arguments = {}
+        return match.group(1), arguments
+
+
+async def _run_request(gemini, request, log):
+    """Let Gemini pick a tool for one request and call it over MCP.
+
+    Output lines go to log, so concurrent requests don't interleave.
+    """
+    # Ask Gemini what to do
+    prompt = f"---\nUser request: {request}{_PROMPT_SUFFIX}"
+
+    gemini_response = await gemini.ask_gemini(prompt, stop_at_tool_call=True)
+    log(f"🤖 Gemini: {gemini_response}")
+
+    # Extract tool call
+    tool_name, arguments = gemini.extract_tool_call(gemini_response)
 
-                # Now call the MCP tool using the same pattern as working demo
-                try:
-                    server_params = StdioServerParameters(
-                        command="python",
-                        args=[
-                            str(
-                                Path(__file__).parent.parent.parent
-                                / "core"
-                                / "server"
-                                / "vuln_mcp_stdio.py"
-                            )
-                        ],
-                        env={
-                            "PYTHONPATH": str(
-                                Path(__file__).parent.parent.parent
-                            )
-                        },
-                    )
-
-                    async with stdio_client(server_params) as (read, write):
-                        async with ClientSession(read, write) as session:
-                            await session.initialize()
-
-                            # Call the tool
-                            result = await session.call_tool(
-                                tool_name, arguments
-                            )
-
-                            if result.content:
-                                tool_result = result.content[0].text
-                                print(f"📄 MCP Tool Result: {tool_result}")
-
-                                # Ask Gemini to interpret the result
-                                interpretation_prompt = f"""
+    if tool_name and arguments:
+        log(
+            f"🔧 Gemini wants to call: {tool_name} with args: {arguments}"
+        )
+
+        # Call the tool over the shared MCP session
+        try:
+            result = await gemini.session.call_tool(tool_name, arguments)
+
+            if result.content:
+                tool_result = result.content[0].text
+                log(f"📄 MCP Tool Result: {tool_result}")
+
+                # Ask Gemini to interpret the result
+                interpretation_prompt = f"""---
 The user asked: {request}
 I called tool {tool_name} and got this result: {tool_result}
 
 Please provide a helpful response to the user explaining what was found/done.
 """
-                                interpretation = gemini.ask_gemini(
-                                    interpretation_prompt
-                                )
-                                print(f"🤖 Gemini: {interpretation}")
-                            else:
-                                print("❌ No result from MCP tool")
-                    print()
-
-                except Exception as e:
-                    print(f"❌ Error calling MCP tool: {e}")
-                    print()
+                interpretation = await gemini.ask_gemini(interpretation_prompt)
+                log(f"🤖 Gemini: {interpretation}")
             else:
-                # Gemini decided no tool was needed - this is normal behavior
-                print(
-                    "✅ Gemini determined no PII detection/sanitization needed"
-                )
-                print(
-                    "🤖 Gemini: No sensitive information detected in the provided text."
+                log("❌ No result from MCP tool")
+            log("")
+
+        except Exception as e:
+            log(f"❌ Error calling MCP tool: {e}")
+            log("")
+    else:
+        # Gemini decided no tool was needed - this is normal behavior
+        log("✅ Gemini determined no PII detection/sanitization needed")
+        log(
+            "🤖 Gemini: No sensitive information detected in the provided text."
+        )
+        log("")
+
+
+async def simple_gemini_demo():
+    """Simple demo using Gemini + MCP."""
+
+    print("=" * 80)
+    print("🤖 SIMPLE GEMINI + MCP DEMO")
+    print("=" * 80)
+    print()
+    print("This uses Gemini to decide which MCP tools to call.")
+    print()
+
+    try:
+        # Initialize Gemini and start the MCP server once for all requests
+        async with SimpleGeminiMCP() as gemini:
+            # Demo requests
+            demo_requests = [
+                "Detect PII in john@example.com",
+                "Sanitize Contact john@example.com or call 555-123-4567",
+                "Mask the PII in john@example.com",
+                "Remove PII from My SSN is 123-45-6789",
+            ]
+
+            print("🎬 Running Simple Gemini + MCP demo...")
+            print()
+
+            # The requests are independent, so run them concurrently over
+            # the one MCP session and print each one's output in order
+            logs = [[] for _ in demo_requests]
+            await asyncio.gather(
+                *(
+                    _run_request(gemini, request, log.append)
+                    for request, log in zip(demo_requests, logs)
                 )
-                print()
+            )
+
+            for i, (request, log) in enumerate(zip(demo_requests, logs), 1):
+                print(f"--- Demo {i} ---")
+                print(f"👤 User: {request}")
+                print("\n".join(log))
 
-        print("✅ Simple Gemini + MCP demo completed!")
+            print("✅ Simple Gemini + MCP demo completed!")
 
     except Exception as e:
         print(f"❌ Demo failed: {e}")
@@ -3,14 +3,26 @@
 Ollama LLM Integration with MCP Sanitizer
 
 This integrates Ollama (local LLM) with our MCP sanitizer tools.
+
+The demo sends its requests concurrently. Start the server with parallel
+slots so Ollama decodes them together instead of queueing them:
+
+    OLLAMA_NUM_PARALLEL=4 ollama serve
 """
 
 import asyncio
+import hashlib
 import json
+import re
 import sys
 import requests
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from functools import lru_cache
 from pathlib import Path
 
+from requests.adapters import HTTPAdapter
+
 # Add MCP to path
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -26,66 +38,223 @@ except ImportError:
     from mcp.client.stdio import stdio_client
 
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The TOOL_CALL line and the ARGUMENTS line after it, found in one search
+_TOOL_CALL_RE = re.compile(
+    r"^TOOL_CALL:\s*(\S+).*?^ARGUMENTS:([^\n]*)", re.MULTILINE | re.DOTALL
+)
+
+# 4-bit K-quant: decode is memory-bound, so this roughly doubles tokens/s
+# over 8-bit weights and quarters the traffic of FP16
+DEFAULT_MODEL = "llama3.2:3b-instruct-q4_K_M"
+
+# Ollama quantization levels from coarsest to finest; anything outside
+# Q4_K_M..Q8_0 gets a warning
+_QUANT_LEVELS = (
+    "Q2_K",
+    "Q3_K_S",
+    "Q3_K_M",
+    "Q3_K_L",
+    "Q4_0",
+    "Q4_1",
+    "Q4_K_S",
+    "Q4_K_M",
+    "Q5_0",
+    "Q5_1",
+    "Q5_K_S",
+    "Q5_K_M",
+    "Q6_K",
+    "Q8_0",
+    "F16",
+    "BF16",
+    "F32",
+)
+_QUANT_SUFFIX_RE = re.compile(
+    r"(?:^|-)(q\d\w*|fp16|f16|bf16|f32)$", re.IGNORECASE
+)
+
+# The stdio MCP server, launched with MCP_Server on its import path
+_MCP_SERVER_DIR = Path(__file__).parent.parent.parent
+_SERVER_PARAMS = StdioServerParameters(
+    command="python",
+    args=[str(_MCP_SERVER_DIR / "core" / "server" / "vuln_mcp_stdio.py")],
+    env={"PYTHONPATH": str(_MCP_SERVER_DIR)},
+)
+
+# Sent as Ollama's "system" field on every call, so the server can keep
+# this stable prefix in its KV cache across generations
+_SYSTEM_PROMPT = """You are a helpful AI assistant with access to PII sanitization tools.
+
+Available tools:
+- detect_pii(text): Detect PII in text
+- sanitize_text(text, redaction_type): Sanitize text (redaction_type: generic, mask, remove)
+- get_sanitization_report(text): Get detailed PII report
+- sanitize_file(file_path, redaction_type): Sanitize file content
+
+When users ask you to:
+- "detect PII" or "check for PII" → use detect_pii tool
+- "sanitize" or "redact" → use sanitize_text with generic redaction
+- "mask" → use sanitize_text with mask redaction  
+- "remove PII" → use sanitize_text with remove redaction
+- "sanitize file" → use sanitize_file tool
+
+Always call the appropriate tool and explain what you found/did.
+
+Format your tool calls as:
+TOOL_CALL: tool_name
+ARGUMENTS: {"arg1": "value1", "arg2": "value2"}
+
+Then I'll execute the tool and give you the result."""
+
+_PROMPT_SUFFIX = "\n\nWhat tool should I call and with what arguments?"
+
+# Ollama replies by (model, system, prompt) digest
+_RESPONSE_CACHE = OrderedDict()
+_RESPONSE_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=1)
+def _get_session():
+    """Shared keep-alive HTTP session for talking to Ollama."""
+    session = requests.Session()
+    session.mount(
+        "http://", HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    )
+    return session
+
+
+def _loads(data):
+    """Parse a JSON document from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def with_quant(model_name, quant):
+    """
+    Swap the quantization suffix of a model tag, e.g. q4_K_M → q8_0.
+
+    Ollama only publishes quantized variants under a size/variant prefix
+    (llama3.2:3b-instruct-q8_0), so a bare or "latest" tag is rejected
+    rather than guessed into a tag that does not exist.
+    """
+    name, _, tag = model_name.partition(":")
+    tag = _QUANT_SUFFIX_RE.sub("", tag)
+    if not tag or tag.lower() == "latest":
+        raise ValueError(
+            f"Cannot apply quantization {quant!r} to {model_name!r}; pass a "
+            f"full tag instead, e.g. --model {name}:<size>-<variant>-{quant}"
+        )
+    return f"{name}:{tag}-{quant}"
+
+
+def quant_warning(level):
+    """Describe why a quantization level is a poor fit, or return None."""
+    if level not in _QUANT_LEVELS:
+        return None
+    index = _QUANT_LEVELS.index(level)
+    if index < _QUANT_LEVELS.index("Q4_K_M"):
+        return f"{level} is coarser than Q4_K_M; expect weaker tool calls"
+    if index > _QUANT_LEVELS.index("Q8_0"):
+        return f"{level} is finer than Q8_0; expect slower generation"
+    return None
+
+
+def _echo_token(token):
+    """Write a streamed token to stdout immediately."""
+    sys.stdout.write(token)
+    sys.stdout.flush()
+
+
 class OllamaLLMWithMCP:
     """Ollama LLM integrated with MCP sanitizer tools."""
 
     def __init__(
-        self, model_name="llama3.2", ollama_url="http://localhost:11434"
+        self, model_name=DEFAULT_MODEL, ollama_url="http://localhost:11434"
     ):
         """Initialize Ollama with model name and URL."""
         self.model_name = model_name
         self.ollama_url = ollama_url
+        # Pooled connections, reused by every Ollama request
+        self.http = _get_session()
         self.mcp_session = None
         self.available_tools = {}
+        self._tools_task = None
+        self._exit_stack = AsyncExitStack()
 
         # Test Ollama connection
         try:
-            response = requests.get(f"{ollama_url}/api/tags", timeout=5)
+            response = self.http.get(f"{ollama_url}/api/tags", timeout=5)
             if response.status_code == 200:
                 print(f"✅ Connected to Ollama at {ollama_url}")
+                for model in response.json().get("models", []):
+                    if model["name"] != model_name:
+                        continue
+                    level = model.get("details", {}).get("quantization_level")
+                    warning = quant_warning(level)
+                    if warning:
+                        print(f"⚠️  {model_name}: {warning}")
             else:
                 print(f"❌ Ollama not responding at {ollama_url}")
         except Exception as e:
             print(f"❌ Cannot connect to Ollama: {e}")
-            print("Make sure Ollama is running: ollama serve")
+            print(
+                "Make sure Ollama is running: OLLAMA_NUM_PARALLEL=4 ollama serve"
+            )
 
     async def connect_to_mcp(self):
         """Connect to the MCP sanitizer server."""
         try:
-            server_params = StdioServerParameters(
-                command="python",
-                args=["vuln_mcp_stdio.py"],
-                env={"PYTHONPATH": str(Path(__file__).parent)},
+            print("🔌 Connecting to MCP server...")
+            # The exit stack keeps the server and session open until aclose()
+            read, write = await self._exit_stack.enter_async_context(
+                stdio_client(_SERVER_PARAMS)
             )
+            self.mcp_session = await self._exit_stack.enter_async_context(
+                ClientSession(read, write)
+            )
+            await self.mcp_session.initialize()
 
-            print("🔌 Connecting to MCP server...")
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    self.mcp_session = session
-                    await session.initialize()
-
-                    # Get available tools
-                    tools_result = await session.list_tools()
-                    self.available_tools = {
-                        tool.name: tool for tool in tools_result.tools
-                    }
-
-                    print("✅ Connected to MCP server")
-                    print(
-                        f"✅ Available tools: {list(self.available_tools.keys())}"
-                    )
-                    return True
+            # Fetch the tool list in the background; it overlaps with the
+            # first Ollama call and is awaited before the first tool call
+            self._tools_task = asyncio.create_task(self._load_tools())
+
+            print("✅ Connected to MCP server")
+            return True
 
         except Exception as e:
             print(f"❌ Failed to connect to MCP: {e}")
+            await self.aclose()
             return False
 
+    async def _load_tools(self):
+        """Get available tools from the MCP server."""
+        tools_result = await self.mcp_session.list_tools()
+        self.available_tools = {tool.name: tool for tool in tools_result.tools}
+        print(f"✅ Available tools: {list(self.available_tools.keys())}")
+
+    async def aclose(self):
+        """Close the MCP session and stop the server."""
+        if self._tools_task is not None:
+            self._tools_task.cancel()
+            await asyncio.gather(self._tools_task, return_exceptions=True)
+            self._tools_task = None
+        await self._exit_stack.aclose()
+        self.mcp_session = None
+
     async def call_mcp_tool(self, tool_name, arguments):
         """Call an MCP tool."""
-        if not self.mcp_session or tool_name not in self.available_tools:
+        if not self.mcp_session:
             return None
 
         try:
+            await self._tools_task
+            if tool_name not in self.available_tools:
+                return None
             result = await self.mcp_session.call_tool(tool_name, arguments)
             if result.content:
                 return result.content[0].text
@@ -94,109 +263,172 @@ class OllamaLLMWithMCP:
             print(f"❌ Error calling tool {tool_name}: {e}")
             return None
 
-    def call_ollama(self, prompt, system_prompt=None):
-        """Call Ollama LLM."""
+    def call_ollama(self, prompt, system_prompt=None, on_token=None):
+        """Call Ollama LLM, streaming tokens to on_token as they arrive.
+
+        Returns the full response text, or None on error. A prompt already
+        answered by the same model is served from the cache in one token.
+        """
+        key = hashlib.blake2b(
+            "\0".join((self.model_name, system_prompt or "", prompt)).encode(),
+            digest_size=16,
+        ).digest()
+        reply = _RESPONSE_CACHE.get(key)
+        if reply is not None:
+            _RESPONSE_CACHE.move_to_end(key)
+            if on_token:
+                on_token(reply)
+            return reply
+
+        reply = self._generate(prompt, system_prompt, on_token)
+        if reply:
+            _RESPONSE_CACHE[key] = reply
+            if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_SIZE:
+                _RESPONSE_CACHE.popitem(last=False)
+        return reply
+
+    def _generate(self, prompt, system_prompt, on_token):
+        """Stream one completion from /api/generate."""
         try:
             payload = {
                 "model": self.model_name,
                 "prompt": prompt,
-                "stream": False,
+                "stream": True,
                 "options": {"temperature": 0.7, "top_p": 0.9},
             }
 
             if system_prompt:
                 payload["system"] = system_prompt
 
-            response = requests.post(
-                f"{self.ollama_url}/api/generate", json=payload, timeout=30
-            )
-
-            if response.status_code == 200:
-                return response.json()["response"]
-            else:
-                print(f"❌ Ollama error: {response.status_code}")
-                return None
+            with self.http.post(
+                f"{self.ollama_url}/api/generate",
+                json=payload,
+                stream=True,
+                timeout=30,
+            ) as response:
+                if response.status_code != 200:
+                    print(f"❌ Ollama error: {response.status_code}")
+                    return None
+
+                # One JSON object per line until "done"
+                parts = []
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = _loads(line)
+                    token = chunk.get("response", "")
+                    if token:
+                        parts.append(token)
+                        if on_token:
+                            on_token(token)
+                    if chunk.get("done"):
+                        break
+                return "".join(parts)
 
         except Exception as e:
             print(f"❌ Error calling Ollama: {e}")
             return None
 
-    def create_system_prompt(self):
-        """Create system prompt for Ollama with MCP tools."""
-        return """You are a helpful AI assistant with access to PII sanitization tools.
-
-Available tools:
-- detect_pii(text): Detect PII in text
-- sanitize_text(text, redaction_type): Sanitize text (redaction_type: generic, mask, remove)
-- get_sanitization_report(text): Get detailed PII report
-- sanitize_file(file_path, redaction_type): Sanitize file content
-
-When users ask you to:
-- "detect PII" or "check for PII" → use detect_pii tool
-- "sanitize" or "redact" → use sanitize_text with generic redaction
-- "mask" → use sanitize_text with mask redaction  
-- "remove PII" → use sanitize_text with remove redaction
-- "sanitize file" → use sanitize_file tool
-
-Always call the appropriate tool and explain what you found/did.
-
-Format your tool calls as:
-TOOL_CALL: tool_name
-ARGUMENTS: {"arg1": "value1", "arg2": "value2"}
-
-Then I'll execute the tool and give you the result."""
-
-    async def process_user_request(self, user_input):
-        """Process user request using Ollama + MCP tools."""
-        print(f"\n👤 User: {user_input}")
+    def prefill(self, prompt, system_prompt=None):
+        """Have Ollama process a prompt prefix without generating a reply.
+
+        Best effort: the server keeps the prefix in its slot's KV cache,
+        so a following prompt that starts with it only pays for the rest.
+        """
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": False,
+            "options": {"num_predict": 1},
+        }
+        if system_prompt:
+            payload["system"] = system_prompt
+        try:
+            self.http.post(
+                f"{self.ollama_url}/api/generate", json=payload, timeout=30
+            ).close()
+        except requests.RequestException:
+            pass
+
+    def stream_ollama(self, prompt, system_prompt=None):
+        """Call Ollama, printing the reply as it is generated."""
+        print("🤖 Ollama: ", end="", flush=True)
+        response = self.call_ollama(prompt, system_prompt, _echo_token)
+        print()
+        return response
+
+    async def process_user_request(self, user_input, log=None):
+        """Process user request using Ollama + MCP tools.
+
+        By default replies stream to stdout. With a log callable, output
+        lines go to it instead, so several requests can be processed
+        concurrently. Either way Ollama runs on a worker thread, leaving
+        the loop free for MCP work such as the background tool listing.
+        """
+        say = print if log is None else log
+
+        async def ask(prompt):
+            if log is None:
+                return await asyncio.to_thread(
+                    self.stream_ollama, prompt, _SYSTEM_PROMPT
+                )
+            reply = await asyncio.to_thread(
+                self.call_ollama, prompt, _SYSTEM_PROMPT
+            )
+            if reply:
+                log(f"🤖 Ollama: {reply}")
+            return reply
 
-        # Create conversation with system prompt
-        system_prompt = self.create_system_prompt()
+        say(f"\n👤 User: {user_input}")
 
-        # Ask Ollama what to do
-        prompt = f"{system_prompt}\n\nUser request: {user_input}\n\nWhat tool should I call and with what arguments?"
+        # Ask Ollama what to do; the instructions go in the system field
+        prompt = f"---\nUser request: {user_input}{_PROMPT_SUFFIX}"
 
         try:
-            response = self.call_ollama(prompt, system_prompt)
+            response = await ask(prompt)
             if not response:
                 return "❌ Failed to get response from Ollama"
 
-            print(f"🤖 Ollama: {response}")
-
             # Parse Ollama's response for tool calls
             if "TOOL_CALL:" in response:
-                lines = response.split("\n")
+                match = _TOOL_CALL_RE.search(response)
                 tool_name = None
                 arguments = {}
 
-                for line in lines:
-                    if line.startswith("TOOL_CALL:"):
-                        tool_name = line.split(":", 1)[1].strip()
-                    elif line.startswith("ARGUMENTS:"):
-                        try:
-                            args_str = line.split(":", 1)[1].strip()
-                            arguments = json.loads(args_str)
-                        except:
-                            print("❌ Could not parse arguments")
+                if match is not None:
+                    tool_name = match.group(1)
+                    try:
+                        arguments = _loads(match.group(2))
+                    except ValueError:
+                        say("❌ Could not parse arguments")
 
                 if tool_name and arguments:
-                    print(
+                    say(
                         f"🔧 Calling tool: {tool_name} with args: {arguments}"
                     )
-                    result = await self.call_mcp_tool(tool_name, arguments)
+                    # Everything before the tool result is known now, so
+                    # let Ollama process that prefix while the tool runs
+                    prefix = (
+                        f"---\nThe user asked: {user_input}\n"
+                        f"I called tool {tool_name} and got this result: "
+                    )
+                    result, _ = await asyncio.gather(
+                        self.call_mcp_tool(tool_name, arguments),
+                        asyncio.to_thread(
+                            self.prefill, prefix, _SYSTEM_PROMPT
+                        ),
+                    )
 
                     if result:
-                        print(f"📄 Tool result: {result[:200]}...")
+                        say(f"📄 Tool result: {result[:200]}...")
 
-                        # Ask Ollama to interpret the result
-                        interpretation_prompt = f"""
-The user asked: {user_input}
-I called tool {tool_name} and got this result: {result}
+                        # Ask Ollama to interpret the result, behind the
+                        # same system prompt so the cached prefix is reused
+                        interpretation_prompt = f"""{prefix}{result}
 
 Please provide a helpful response to the user explaining what was found/done.
 """
-                        interpretation = self.call_ollama(interpretation_prompt)
-                        print(f"🤖 Ollama: {interpretation}")
+                        interpretation = await ask(interpretation_prompt)
                         return interpretation
                     else:
                         return "❌ Tool call failed"
@@ -206,11 +438,11 @@ Please provide a helpful response to the user explaining what was found/done.
                 return response
 
         except Exception as e:
-            print(f"❌ Error with Ollama: {e}")
+            say(f"❌ Error with Ollama: {e}")
             return f"❌ Error: {e}"
 
 
-async def ollama_demo():
+async def ollama_demo(model_name=DEFAULT_MODEL):
     """Demo Ollama LLM with MCP tools."""
 
     print("=" * 80)
@@ -222,9 +454,10 @@ async def ollama_demo():
     )
     print()
 
+    llm = None
     try:
         # Initialize Ollama LLM
-        llm = OllamaLLMWithMCP()
+        llm = OllamaLLMWithMCP(model_name)
 
         # Connect to MCP
         if not await llm.connect_to_mcp():
@@ -241,9 +474,19 @@ async def ollama_demo():
         print("🎬 Running Ollama + MCP demo...")
         print()
 
-        for i, request in enumerate(demo_requests, 1):
+        # The requests are independent, so run them concurrently and
+        # print each one's output once all are done
+        logs = [[] for _ in demo_requests]
+        await asyncio.gather(
+            *(
+                llm.process_user_request(request, log.append)
+                for request, log in zip(demo_requests, logs)
+            )
+        )
+
+        for i, log in enumerate(logs, 1):
             print(f"--- Demo {i} ---")
-            response = await llm.process_user_request(request)
+            print("\n".join(log))
             print()
 
         print("✅ Ollama + MCP demo completed!")
@@ -253,9 +496,12 @@ async def ollama_demo():
         import traceback
 
         traceback.print_exc()
+    finally:
+        if llm is not None:
+            await llm.aclose()
 
 
-async def interactive_ollama():
+async def interactive_ollama(model_name=DEFAULT_MODEL):
     """Interactive Ollama LLM demo."""
 
     print("=" * 80)
@@ -267,9 +513,10 @@ async def interactive_ollama():
     print("Type 'quit' to exit")
     print()
 
+    llm = None
     try:
         # Initialize Ollama LLM
-        llm = OllamaLLMWithMCP()
+        llm = OllamaLLMWithMCP(model_name)
 
         # Connect to MCP
         if not await llm.connect_to_mcp():
@@ -303,17 +550,25 @@ async def interactive_ollama():
         import traceback
 
         traceback.print_exc()
+    finally:
+        if llm is not None:
+            await llm.aclose()
 
 
-def check_ollama_models():
+def check_ollama_models(session=None):
     """Check what Ollama models are available."""
+    session = session or _get_session()
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
+        response = session.get("http://localhost:11434/api/tags", timeout=5)
         if response.status_code == 200:
             models = response.json().get("models", [])
             print("Available Ollama models:")
             for model in models:
-                print(f"  - {model['name']}")
+                level = model.get("details", {}).get("quantization_level")
+                warning = quant_warning(level)
+                print(f"  - {model['name']} ({level or 'unknown quant'})")
+                if warning:
+                    print(f"    ⚠️  {warning}")
             return [model["name"] for model in models]
         else:
             print("❌ Could not get Ollama models")
@@ -337,18 +592,31 @@ if __name__ == "__main__":
         "--models", action="store_true", help="List available Ollama models"
     )
     parser.add_argument(
-        "--model", default="llama3.2", help="Ollama model to use"
+        "--model", default=DEFAULT_MODEL, help="Ollama model to use"
+    )
+    parser.add_argument(
+        "--quant",
+        help="Quantization tag for --model, e.g. q4_K_M, q8_0 or fp16",
     )
 
     args = parser.parse_args()
+    model_name = args.model
+    if args.quant:
+        try:
+            model_name = with_quant(model_name, args.quant)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"🔧 Using model {model_name}")
 
     if args.models:
         check_ollama_models()
     elif args.demo:
-        asyncio.run(ollama_demo())
+        asyncio.run(ollama_demo(model_name))
     elif args.interactive:
-        asyncio.run(interactive_ollama())
+        asyncio.run(interactive_ollama(model_name))
     else:
         print("Choose --demo, --interactive, or --models")
-        print("Make sure Ollama is running: ollama serve")
+        print(
+            "Make sure Ollama is running: OLLAMA_NUM_PARALLEL=4 ollama serve"
+        )
         print("Example: python ollama_llm_integration.py --demo")
@@ -16,6 +16,11 @@ import sys
 from pathlib import Path
 
 
+# Seed data shared with the vulnerable servers
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "core"))
+from server.sample_db import seed_records  # noqa: E402
+
+
 class VulnerableMCPSimulator:
     """Simulates the vulnerable MCP server functionality for demonstration."""
 
@@ -26,31 +31,10 @@ class VulnerableMCPSimulator:
     def setup_database(self):
         """Create the SQLite database and table if they don't exist."""
         conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                address TEXT NOT NULL,
-                email TEXT,
-                phone TEXT,
-                credit_card TEXT
-            )
-        """
-        )
-        # Insert some sample data
-        cursor.execute("DELETE FROM records")
-        cursor.execute(
-            "INSERT INTO records (name, address, email, phone, credit_card) VALUES ('Alice Johnson', '123 Main St', 'alice@example.com', '555-0123', '4532-1234-5678-9012')"
-        )
-        cursor.execute(
-            "INSERT INTO records (name, address, email, phone, credit_card) VALUES ('Bob Smith', '456 Oak Ave', 'bob@example.com', '555-0456', '5555-1234-5678-9012')"
-        )
-        cursor.execute(
-            "INSERT INTO records (name, address, email, phone, credit_card) VALUES ('Carol Davis', '789 Pine Rd', 'carol@example.com', '555-0789', '6011-1234-5678-9012')"
-        )
-        conn.commit()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # One transaction for the whole reset instead of a commit per statement
+        seed_records(conn)
         conn.close()
         print("✓ Database initialized with sample data")
 
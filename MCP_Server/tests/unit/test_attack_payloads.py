@@ -0,0 +1,112 @@
+import os
+import sys
+
+import pytest
+
+INTEGRATION_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "integration")
+)
+sys.path.insert(0, INTEGRATION_DIR)
+
+import attack_payloads  # noqa: E402
+from attack_payloads import (  # noqa: E402
+    ATTACK_PAYLOADS,
+    classify_ext,
+    contains_category_payload,
+    contains_payload,
+    find_payloads,
+    get_category_size,
+    get_payloads_by_category,
+    get_random_payloads,
+    has_sensitive_ext,
+    has_weak_crypto,
+    is_in_category,
+    is_known_payload,
+    is_path_traversal,
+    is_sensitive_file,
+    longest_sensitive_prefix,
+    longest_traversal_prefix,
+)
+
+
+def test_payload_catalog_is_read_only():
+    with pytest.raises(TypeError):
+        ATTACK_PAYLOADS["sql_injection"] = ()
+    for payloads in ATTACK_PAYLOADS.values():
+        assert isinstance(payloads, tuple)
+
+
+def test_categories_have_no_duplicate_payloads():
+    for category, payloads in ATTACK_PAYLOADS.items():
+        assert len(set(payloads)) == len(payloads), category
+
+
+def test_category_sizes_match_payloads():
+    for category, payloads in ATTACK_PAYLOADS.items():
+        assert get_category_size(category) == len(payloads)
+    assert get_category_size("unknown") == 0
+    assert get_payloads_by_category("unknown") == ()
+
+
+def test_random_payloads_are_distinct_members():
+    picked = get_random_payloads("sql_injection", 5)
+    assert len(picked) == 5
+    assert len(set(picked)) == 5
+    assert all(p in attack_payloads.SQL_INJECTION_PAYLOADS for p in picked)
+
+    weak = get_random_payloads("weak_crypto", 100)
+    assert sorted(weak) == sorted(attack_payloads.WEAK_CRYPTO_ALGORITHMS)
+    assert get_random_payloads("unknown") == []
+
+
+def test_find_payloads_reports_categories():
+    text = "GET /download?file=../../../etc/passwd HTTP/1.1"
+    found = find_payloads(text)
+    assert ("path_traversal", "../../../etc/passwd") in found
+    assert contains_payload(text)
+    assert not contains_payload("")
+    assert contains_category_payload(text, "path_traversal")
+    assert contains_category_payload(text.encode(), "sensitive_files")
+    assert not contains_category_payload(text, "sql_injection")
+    assert not contains_category_payload(text, "unknown")
+
+
+def test_sensitive_file_lookups():
+    assert is_sensitive_file("/etc/shadow")
+    assert not is_sensitive_file("/etc/shadow.bak")
+    assert longest_sensitive_prefix("/root/.ssh/id_rsa.pub.old") == (
+        "/root/.ssh/id_rsa.pub"
+    )
+    assert longest_sensitive_prefix("/srv/app.conf") is None
+    assert longest_traversal_prefix("../../../etc/passwd%00.png") == (
+        "../../../etc/passwd"
+    )
+
+
+def test_known_payload_lookup():
+    assert is_known_payload("' OR 1=1 --")
+    assert is_known_payload("AWS_SECRET_ACCESS_KEY")
+    assert not is_known_payload("hello world")
+    assert is_in_category("/etc/hosts", "path_traversal")
+    assert is_in_category("/etc/hosts", "sensitive_files")
+    assert not is_in_category("/etc/hosts", "ssrf")
+    assert not is_in_category("/etc/hosts", "unknown")
+
+
+def test_path_traversal_matches_encoded_variants():
+    assert is_path_traversal("../../../etc/passwd")
+    assert is_path_traversal("..%2F..%2F..%2Fetc%2Fpasswd")
+    assert is_path_traversal("..%25252f..%252f..%2fetc/passwd")
+    assert is_path_traversal("..\\..\\WINDOWS\\system32\\config\\SAM")
+    assert not is_path_traversal("../etc/passwd")
+
+
+def test_weak_crypto_and_extension_checks():
+    assert has_weak_crypto("digest = hashlib.MD5(data)")
+    assert not has_weak_crypto("digest = hashlib.sha256(data)")
+    assert has_sensitive_ext("backups/db.SQLITE3")
+    assert not has_sensitive_ext("app/main.py")
+    assert classify_ext("/srv/.ENV") == ".env"
+    assert classify_ext("site.config") == ".config"
+    assert classify_ext("keys/server.keystore") == ".keystore"
+    assert classify_ext("config") is None
@@ -0,0 +1,62 @@
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("mcp")
+
+GEMINI_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "llm", "gemini")
+)
+sys.path.insert(0, GEMINI_DIR)
+
+import gemini_auto_detect  # noqa: E402
+from gemini_auto_detect import AutoDetectGeminiMCP  # noqa: E402
+
+
+class _FakeSession:
+    """Answers call_tool, remembering which loop each call ran on."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+
+    async def call_tool(self, name, arguments):
+        assert asyncio.get_running_loop() is self.loop
+        text = json.dumps({"tool": name, "text": arguments["text"]})
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+class _FakeMultiClient:
+    closed = []
+
+    def __init__(self):
+        self.sessions = {"sanitizer": _FakeSession()}
+
+    @classmethod
+    async def start(cls, params_by_name):
+        return cls()
+
+    async def aclose(self):
+        self.closed.append(self)
+
+
+def test_sync_api_works_on_client_built_inside_a_loop(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(gemini_auto_detect, "MCPMultiClient", _FakeMultiClient)
+    _FakeMultiClient.closed.clear()
+
+    async def main():
+        # The constructor starts connecting on this loop; the sync
+        # wrappers must not await that task from the runner's loop
+        client = AutoDetectGeminiMCP()
+        result = await asyncio.to_thread(client.detect_pii_sync, "a@b.c")
+        await asyncio.to_thread(client.close_sync)
+        await client.aclose()
+        return result
+
+    assert asyncio.run(main()) == {"tool": "detect_pii", "text": "a@b.c"}
+    assert len(_FakeMultiClient.closed) == 2
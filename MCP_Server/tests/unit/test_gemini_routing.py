@@ -0,0 +1,88 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("mcp")
+
+GEMINI_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "llm", "gemini")
+)
+sys.path.insert(0, GEMINI_DIR)
+
+from gemini_interactive import _route  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "user_input, expected",
+    [
+        (
+            "Sanitize file /tmp/a.txt",
+            (
+                "sanitize_file",
+                {"file_path": "/tmp/a.txt", "redaction_type": "generic"},
+            ),
+        ),
+        (
+            "Sanitize the file /tmp/a.txt",
+            (
+                "sanitize_file",
+                {"file_path": "/tmp/a.txt", "redaction_type": "generic"},
+            ),
+        ),
+        (
+            "mask the PII in the file /tmp/my log.txt  ",
+            (
+                "sanitize_file",
+                {"file_path": "/tmp/my log.txt", "redaction_type": "mask"},
+            ),
+        ),
+        (
+            "Mask the PII in call 555-123-4567",
+            (
+                "sanitize_text",
+                {"text": "call 555-123-4567", "redaction_type": "mask"},
+            ),
+        ),
+        (
+            "redact john@example.com",
+            (
+                "sanitize_text",
+                {"text": "john@example.com", "redaction_type": "generic"},
+            ),
+        ),
+        (
+            "Remove PII from ssn 123-45-6789",
+            (
+                "sanitize_text",
+                {"text": "ssn 123-45-6789", "redaction_type": "remove"},
+            ),
+        ),
+        (
+            "Detect PII in john@example.com",
+            ("detect_pii", {"text": "john@example.com"}),
+        ),
+        (
+            "check for pii on 10.0.0.1",
+            ("detect_pii", {"text": "10.0.0.1"}),
+        ),
+    ],
+)
+def test_route_accepted_forms(user_input, expected):
+    assert _route(user_input) == expected
+
+
+@pytest.mark.parametrize(
+    "user_input",
+    [
+        "What is PII?",
+        "sanitize",
+        "check this",
+        "remove that line",
+        "detect file /tmp/a.txt",
+        "Please sanitize john@example.com",
+    ],
+)
+def test_route_falls_through_to_gemini(user_input):
+    assert _route(user_input) == (None, {})
@@ -0,0 +1,48 @@
+import io
+import os
+import sys
+
+import pytest
+
+AGENT_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "core", "agent")
+)
+sys.path.insert(0, AGENT_DIR)
+
+from sanitizer_agent import SanitizerAgent  # noqa: E402
+
+
+def _stream(agent, text, redaction_type, chunk_size):
+    dst = io.StringIO()
+    summary = agent.sanitize_stream(
+        io.StringIO(text), dst, redaction_type, chunk_size=chunk_size
+    )
+    return dst.getvalue(), summary
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "alpha john@example.com beta\n" * 3 + "gamma delta\n" * 3,
+        "  gamma delta\n\n" * 3 + "alpha john@example.com\n  \n" * 3,
+        "gamma delta\n" * 6,
+    ],
+)
+def test_multi_block_remove_matches_sanitize_text(text):
+    agent = SanitizerAgent()
+    streamed, summary = _stream(agent, text, "remove", chunk_size=30)
+    whole = agent.sanitize_text(text, "remove")
+
+    assert streamed == whole["sanitized_text"]
+    assert summary["total_detections"] == whole["detection_summary"][
+        "total_detections"
+    ]
+
+
+def test_unique_pii_count_merges_values_across_blocks():
+    agent = SanitizerAgent()
+    text = "mail john@example.com\n" * 4 + "mail jane@example.com\n"
+    _, summary = _stream(agent, text, "generic", chunk_size=30)
+
+    assert summary["total_detections"] == 5
+    assert summary["unique_pii_count"] == 2
@@ -53,6 +53,18 @@ def load_spacy_model():
 nlp = load_spacy_model()
 
 
+def parse_batch(texts, batch_size=64):
+    """Parse the sentences of many texts in one nlp.pipe pass.
+
+    Returns one {sentence: Doc} mapping per text, for the docs argument of
+    Enhanced_PII_Logging.
+    """
+    split = [text.split(". ") for text in texts]
+    sentences = list(dict.fromkeys(s for rows in split for s in rows))
+    parsed = dict(zip(sentences, nlp.pipe(sentences, batch_size=batch_size)))
+    return [{s: parsed[s] for s in rows} for rows in split]
+
+
 class Enhanced_PII_Logging:
     def __init__(
         self,
@@ -64,6 +76,7 @@ class Enhanced_PII_Logging:
         enable_proximity=True,
         enable_graph=True,
         window_size=50,
+        docs=None,
     ):
         self.data = data
         self.output = output
@@ -73,6 +86,8 @@ class Enhanced_PII_Logging:
         self.enable_proximity = enable_proximity
         self.enable_graph = enable_graph
         self.window_size = window_size
+        # Parse each sentence once, shared by keyword and graph detection
+        self.docs = docs if docs is not None else parse_batch([data])[0]
 
         self.PII_KEYWORD = {}
         self.PII_PATTERN = {
@@ -128,6 +143,10 @@ class Enhanced_PII_Logging:
 
         self.output_function(data)
 
+    def parsed(self, sentence):
+        doc = self.docs.get(sentence)
+        return doc if doc is not None else nlp(sentence)
+
     def extract_match(self, pattern, text):
         match = re.search(pattern, text)
         return match.group() if match else None
@@ -184,7 +203,7 @@ class Enhanced_PII_Logging:
             )
             ssn_matches = re.findall(r"\b\d{3}-\d{2}-\d{4}\b", sentence)
             name_matches = []
-            doc = nlp(sentence)
+            doc = self.parsed(sentence)
             for token in doc.ents:
                 if token.label_ in ["PERSON"]:
                     name_matches.append(token.text)
@@ -235,7 +254,7 @@ class Enhanced_PII_Logging:
     def keyword_detection(self, data):
         rows = data.split(". ")
         for row, sentence in enumerate(rows):
-            doc = nlp(sentence)
+            doc = self.parsed(sentence)
             for token in doc.ents:
                 if token.label_ in ["PERSON", "ORG", "GPE", "DATE"]:
                     if token.label_ not in self.PII_KEYWORD:
@@ -8,7 +8,11 @@ import pytest
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, PROJECT_ROOT)
 
-from pii_logging import Enhanced_PII_Logging, read_text_from_path  # noqa: E402
+from pii_logging import (  # noqa: E402
+    Enhanced_PII_Logging,
+    parse_batch,
+    read_text_from_path,
+)
 
 
 def test_detection_on_text_with_pii_basic():
@@ -119,3 +123,14 @@ def test_cli_read_text_from_path(tmp_path):
     p.write_text("User email: a@b.com logged in from 10.0.0.1\n")
     read_back = read_text_from_path(str(p))
     assert "a@b.com" in read_back
+
+
+def test_parse_batch_matches_per_text_parsing():
+    texts = [
+        "User John Smith called at 555-123-4567. SSN: 123-45-6789.",
+        "System started successfully. All services healthy.",
+    ]
+    for text, docs in zip(texts, parse_batch(texts)):
+        batched = Enhanced_PII_Logging(text, output=False, docs=docs)
+        single = Enhanced_PII_Logging(text, output=False)
+        assert batched.get_detection_summary() == single.get_detection_summary()